@@ -0,0 +1,89 @@
+import argparse, json, platform, subprocess, time
+import numpy as np
+
+from game.phase_timer import PhaseTimer, PHASES
+from benchmarks.scenarios import SCENARIOS, FIXTURES, create_simulation
+from benchmarks.fuzzer import BudgetExceeded, install_budget
+
+parser = argparse.ArgumentParser(description="Benchmark the simulation tick on seeded scenarios.")
+parser.add_argument("--scenario", action="append", choices=list(SCENARIOS) + list(FIXTURES), help="scenario to run, can be repeated (defaults to all)")
+parser.add_argument("--fixtures", action="store_true", help="also run the rule programs saved by fuzz.py")
+parser.add_argument("--ticks", type=int, default=200, help="timed ticks per scenario")
+parser.add_argument("--warmup", type=int, default=10, help="untimed ticks before measuring")
+parser.add_argument("--seed", type=int, default=0, help="seed for shape positions and velocities")
+parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON results")
+args = parser.parse_args()
+
+FIXTURE_TICK_SECONDS = 5
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_scenario(scenario):
+    simulation = create_simulation(scenario, args.seed)
+
+    # Fuzzer fixtures blew up without a per-tick budget, so they measure how the default event and rule limits
+    # hold them. The wall-clock limit only keeps a regression from hanging the run.
+    if "fuzz" in scenario:
+        install_budget(simulation, float("inf"), FIXTURE_TICK_SECONDS, keep_limits=True)
+
+    ticks, error = 0, None
+    start = time.perf_counter()
+
+    try:
+        for _ in range(args.warmup):
+            simulation.tick()
+
+        simulation.phase_timer = PhaseTimer()
+
+        start = time.perf_counter()
+        for _ in range(args.ticks):
+            simulation.tick()
+            ticks += 1
+    except BudgetExceeded as exception:
+        error = f"{exception.kind}: {exception.detail}"
+    except Exception as exception: # fixtures saved for an exception raise it again
+        error = f"exception: {type(exception).__name__}: {exception}"
+    elapsed = time.perf_counter() - start
+
+    if simulation.phase_timer is None:
+        simulation.phase_timer = PhaseTimer()
+
+    return {
+        "shapes_start": scenario["shapes"],
+        "shapes_end": len(simulation.shapes),
+        "ticks": ticks,
+        "error": error,
+        "total_seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed and ticks else None,
+        "phases": simulation.phase_timer.summary(),
+        **simulation.phase_timer.event_summary()
+    }
+
+results = {
+    "commit": current_commit(),
+    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "python": platform.python_version(),
+    "numpy": np.__version__,
+    "seed": args.seed,
+    "warmup": args.warmup,
+    "scenarios": {}
+}
+
+print(f"{'scenario':<22}{'ticks/s':>10}" + "".join(f"{phase:>16}" for phase in PHASES))
+
+scenarios = {**SCENARIOS, **FIXTURES}
+
+for name in args.scenario or (list(SCENARIOS) + (list(FIXTURES) if args.fixtures else [])):
+    result = run_scenario(scenarios[name]())
+    results["scenarios"][name] = result
+
+    print(f"{name:<22}{result['ticks_per_second'] or 0:>10.1f}" + "".join(f"{result['phases'][phase]['mean_ms']:>13.3f} ms" for phase in PHASES) + (f"  ({result['error']})" if result["error"] else ""))
+
+with open(args.output, "w") as file:
+    file.write(json.dumps(results, indent=4))
+
+print(f"Results written to {args.output}")
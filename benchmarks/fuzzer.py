@@ -0,0 +1,234 @@
+import copy, random
+
+from time import perf_counter
+
+from utils.constants import TRIGGER_RULES, IF_RULES, DO_RULES, FOR_RULES, NEEDS_SHAPE, PROVIDES_SHAPE, VAR_OPTIONS
+
+from game.blocks import new_block, get_rule_dict
+from game.event_dispatcher import EventDispatcher
+from benchmarks.scenarios import create_simulation
+
+# Random rule programs, built the way the editor allows: rules that need a shape only go under rules that provide one.
+# Each program runs headless with a per-tick event and time budget, and the ones that break it are shrunk to the
+# fewest blocks that still break it the same way.
+
+# Nothing fires these without a window
+INPUT_TRIGGERS = ("on_input", "on_left_click", "on_right_click", "on_mouse_move")
+
+RULE_TYPES = {"if": IF_RULES, "do": DO_RULES, "for": FOR_RULES} # rules that can go under a trigger
+
+# A tick that blew its budget after fewer events than this is slow, with more it's a storm. Matches what a game tick
+# processes with the default Max Events Per Tick.
+STORM_EVENTS = 1000
+
+class BudgetExceeded(Exception):
+    def __init__(self, kind, detail):
+        super().__init__(detail)
+        self.kind = kind
+        self.detail = detail
+
+class BudgetedDispatcher(EventDispatcher):
+    # Stops a tick that dispatches more events or takes longer than its budget, instead of letting it run forever
+    def __init__(self, event_budget, tick_seconds, max_events=0, max_rules=0):
+        super().__init__(max_events, max_rules)
+        self.event_budget = event_budget
+        self.tick_seconds = tick_seconds
+
+    def run(self, phase_timer=None):
+        self.dispatched = 0
+        self.counts = {}
+        self.deadline = perf_counter() + self.tick_seconds
+
+        super().run(phase_timer)
+
+    def failure(self, reason):
+        # Whichever limit tripped, the events of the tick tell a storm from a tick that is slow for another reason
+        if self.dispatched < STORM_EVENTS:
+            kind = "slow_tick"
+        elif self.counts.get("spawns", 0) * 2 > self.dispatched:
+            kind = "runaway_spawn"
+        else:
+            kind = "event_storm"
+
+        return BudgetExceeded(kind, f"{reason} after {self.dispatched} events: {dict(sorted(self.counts.items(), key=lambda item: -item[1]))}")
+
+    # Both the plain and the timed dispatch loop look up the rules once per event, so the budget is checked here
+    def matching_rules(self, trigger, event_args):
+        self.dispatched += 1
+        self.counts[trigger] = self.counts.get(trigger, 0) + 1
+
+        if self.dispatched > self.event_budget:
+            raise self.failure(f"more than {self.event_budget} events in one tick")
+
+        if self.dispatched % 256 == 0 and perf_counter() > self.deadline:
+            raise self.failure(f"tick took longer than {self.tick_seconds}s")
+
+        return super().matching_rules(trigger, event_args)
+
+    # FOR loops report here before running their body, so a tick stuck inside one rule run (like nested loops over
+    # a growing world) is stopped too
+    def count_rules(self, rules_run):
+        allowed = super().count_rules(rules_run)
+
+        if perf_counter() > self.deadline:
+            raise self.failure(f"tick took longer than {self.tick_seconds}s")
+
+        return allowed
+
+def random_value(rng, var_type):
+    options = VAR_OPTIONS[var_type]
+
+    if isinstance(options, tuple):
+        return rng.randint(*options)
+
+    return rng.choice(list(options))
+
+def random_block(rng, rule_type, rule, rule_num):
+    user_vars = get_rule_dict(rule_type)[rule]["user_vars"]
+    return new_block(rule_type, rule, rule_num, [random_value(rng, var_type) for var_type in user_vars])
+
+class ProgramGenerator():
+    def __init__(self, rng, max_roots=4, max_children=3, max_depth=4):
+        self.rng = rng
+        self.max_roots = max_roots
+        self.max_children = max_children
+        self.max_depth = max_depth
+        self.next_rule_num = 0
+
+    def block(self, rule_type, rule):
+        block = random_block(self.rng, rule_type, rule, self.next_rule_num)
+        self.next_rule_num += 1
+        return block
+
+    def add_children(self, parent, depth):
+        has_shape = parent.rule in PROVIDES_SHAPE
+        choices = [(rule_type, rule) for rule_type, rules in RULE_TYPES.items() for rule in rules if has_shape or not rule in NEEDS_SHAPE]
+
+        for _ in range(self.rng.randint(1, self.max_children)):
+            rule_type, rule = self.rng.choice(choices)
+            child = self.block(rule_type, rule)
+            parent.children.append(child)
+
+            if rule_type != "do" and depth < self.max_depth:
+                self.add_children(child, depth + 1)
+
+    def program(self):
+        rulesets = {}
+        triggers = [rule for rule in TRIGGER_RULES if not rule in INPUT_TRIGGERS]
+
+        for _ in range(self.rng.randint(1, self.max_roots)):
+            root = self.block("trigger", self.rng.choice(triggers))
+            self.add_children(root, 1)
+            rulesets[root.rule_num] = root
+
+        return rulesets
+
+def install_budget(simulation, event_budget, tick_seconds, keep_limits=False):
+    # Swaps in a BudgetedDispatcher that shares the loaded rules and the event queue of the simulation. The fuzzer
+    # wants the unbounded tick to see the storm, keep_limits keeps the per-tick event and rule limits from the settings.
+    old = simulation.event_dispatcher
+    dispatcher = BudgetedDispatcher(event_budget, tick_seconds, *((old.max_events, old.max_rules) if keep_limits else ()))
+    dispatcher.rules_by_trigger = old.rules_by_trigger
+    dispatcher.queue = simulation.triggered_events
+    simulation.event_dispatcher = dispatcher
+
+    return dispatcher
+
+def run_program(scenario, seed, ticks, event_budget, tick_seconds):
+    # Returns (kind, detail, tick) for the first budget breach or exception, or None if the program ran fine
+    simulation = create_simulation(scenario, seed)
+    dispatcher = install_budget(simulation, event_budget, tick_seconds)
+
+    tick = 0
+
+    try:
+        for tick in range(ticks):
+            start = perf_counter()
+            simulation.tick()
+
+            if perf_counter() - start > tick_seconds:
+                failure = dispatcher.failure(f"tick took longer than {tick_seconds}s")
+                return failure.kind, failure.detail, tick
+    except BudgetExceeded as exception:
+        return exception.kind, exception.detail, tick
+    except Exception as exception:
+        return f"exception_{type(exception).__name__}", f"{type(exception).__name__}: {exception}", tick
+
+    return None
+
+def block_paths(rulesets):
+    # Every block as the path of keys and child indices leading to it, parents before their children
+    paths = []
+
+    def walk(block, path):
+        paths.append(path)
+        for index, child in enumerate(block.children):
+            walk(child, path + (index,))
+
+    for rule_num, block in rulesets.items():
+        walk(block, (rule_num,))
+
+    return paths
+
+def without_block(rulesets, path):
+    rulesets = copy.deepcopy(rulesets)
+
+    if len(path) == 1:
+        del rulesets[path[0]]
+        return rulesets
+
+    parent = rulesets[path[0]]
+    for index in path[1:-1]:
+        parent = parent.children[index]
+    del parent.children[path[-1]]
+
+    return rulesets
+
+def minimize(scenario, seed, failure, ticks, event_budget, tick_seconds):
+    # Greedily drops blocks (with their children) as long as the program still fails with the same kind
+    kind = failure[0]
+    rules = scenario["rules"]
+    shrunk = True
+
+    while shrunk:
+        shrunk = False
+
+        for path in block_paths(rules):
+            candidate = without_block(rules, path)
+            if not candidate:
+                continue
+
+            result = run_program({**scenario, "rules": candidate}, seed, ticks, event_budget, tick_seconds)
+            if result is not None and result[0] == kind:
+                rules, failure, shrunk = candidate, result, True
+                break
+
+    return rules, failure
+
+def rule_names(rulesets):
+    names = []
+
+    def walk(block):
+        names.append(block.rule)
+        for child in block.children:
+            walk(child)
+
+    for block in rulesets.values():
+        walk(block)
+
+    return sorted(names)
+
+def fuzz(programs, seed, scenario, ticks, event_budget, tick_seconds):
+    # Yields (program seed, minimized rules, failure) for every program that breaks its budget or raises
+    rng = random.Random(seed)
+
+    for _ in range(programs):
+        program_seed = rng.randrange(2 ** 32)
+        program = {**scenario, "rules": ProgramGenerator(random.Random(program_seed)).program()}
+
+        failure = run_program(program, program_seed, ticks, event_budget, tick_seconds)
+        if failure is None:
+            continue
+
+        rules, failure = minimize(program, program_seed, failure, failure[2] + 1, event_budget, tick_seconds)
+        yield program_seed, rules, failure
@@ -0,0 +1,141 @@
+import glob, json, os
+
+from utils.constants import SPRITES
+
+from game.blocks import new_block, load_rulesets
+from game.headless import HeadlessSimulation
+from game.events import EMPTY_EVENT
+
+# Every scenario is a function of the shape count that returns the world it runs in and the rules to load.
+# Shapes are spawned by the runner with a seeded Random, so the same seed always gives the same world.
+
+BASIC_SHAPES = ["circle", "rectangle", "triangle"]
+
+class RuleTree():
+    def __init__(self):
+        self.rulesets = {}
+        self.next_rule_num = 0
+
+    def add(self, rule_type, rule, values=(), parent=None):
+        block = new_block(rule_type, rule, self.next_rule_num, values)
+        self.next_rule_num += 1
+
+        if parent is None:
+            self.rulesets[block.rule_num] = block
+        else:
+            parent.children.append(block)
+
+        return block
+
+def keep_inside(tree, parent, world_width, world_height, margin=150):
+    for rule, low, high, velocity_rule in [("x_position_compare", margin, world_width - margin, "change_x_velocity"), ("y_position_compare", margin, world_height - margin, "change_y_velocity")]:
+        tree.add("do", velocity_rule, [1], tree.add("if", rule, ["<", low], parent))
+        tree.add("do", velocity_rule, [-1], tree.add("if", rule, [">", high], parent))
+
+def mixed_shapes(count):
+    tree = RuleTree()
+    world_width, world_height = 1920, 1080
+
+    every_shape = tree.add("for", "every_shape", [], tree.add("trigger", "every_update"))
+    keep_inside(tree, every_shape, world_width, world_height)
+
+    tree.add("do", "change_color", ["RED"], tree.add("trigger", "collides", ["circle", "rectangle"]))
+    tree.add("do", "change_color", ["BLUE"], tree.add("trigger", "collides", ["triangle", "triangle"]))
+
+    return {"world_size": (world_width, world_height), "shapes": count, "shape_types": BASIC_SHAPES, "rules": tree.rulesets}
+
+def collision_heavy(count):
+    tree = RuleTree()
+    world_width, world_height = 800, 600
+
+    for shape_type in BASIC_SHAPES:
+        for target_type in BASIC_SHAPES:
+            collides = tree.add("trigger", "collides", [shape_type, target_type])
+            tree.add("do", "change_color", ["ORANGE"], collides)
+            tree.add("do", "move_x", [0], collides)
+
+    every_shape = tree.add("for", "every_shape", [], tree.add("trigger", "every_update"))
+    keep_inside(tree, every_shape, world_width, world_height, margin=100)
+
+    return {"world_size": (world_width, world_height), "shapes": count, "shape_types": BASIC_SHAPES, "rules": tree.rulesets}
+
+def deep_if_chain(count, depth=32):
+    tree = RuleTree()
+    world_width, world_height = 1920, 1080
+
+    parent = tree.add("for", "every_shape", [], tree.add("trigger", "every_update"))
+    conditions = [("x_position_compare", [">", -10000]), ("y_position_compare", ["<", 10000]), ("size_compare", [">=", 0]), ("color_is", ["WHITE"])]
+
+    for n in range(depth):
+        rule, values = conditions[n % len(conditions)]
+        parent = tree.add("if", rule, values, parent)
+
+    tree.add("do", "move_x", [0], parent)
+
+    return {"world_size": (world_width, world_height), "shapes": count, "shape_types": BASIC_SHAPES, "rules": tree.rulesets}
+
+def every_shape_fan_out(count):
+    tree = RuleTree()
+    world_width, world_height = 1920, 1080
+
+    every_update = tree.add("trigger", "every_update")
+
+    # A FOR inside a FOR runs its body count * count times per tick
+    outer = tree.add("for", "every_shape", [], every_update)
+    inner = tree.add("for", "every_shape", [], tree.add("if", "shape_type_is", ["circle"], outer))
+    tree.add("do", "move_y", [0], tree.add("if", "size_compare", [">", 5], inner))
+
+    for shape_type in BASIC_SHAPES:
+        every_shape = tree.add("for", "every_shape", [], tree.add("trigger", "every_update"))
+        tree.add("do", "change_size", [10], tree.add("if", "shape_type_is", [shape_type], every_shape))
+
+    return {"world_size": (world_width, world_height), "shapes": count, "shape_types": BASIC_SHAPES, "rules": tree.rulesets}
+
+SCENARIOS = {
+    "mixed_100": lambda: mixed_shapes(100),
+    "mixed_1000": lambda: mixed_shapes(1000),
+    "mixed_10000": lambda: mixed_shapes(10000),
+    "collision_heavy": lambda: collision_heavy(2000),
+    "deep_if_chain": lambda: deep_if_chain(1000),
+    "every_shape_fan_out": lambda: every_shape_fan_out(150),
+}
+
+# Rule programs the fuzzer found to blow up, saved by fuzz.py. They are run with the seed they were found with.
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(path):
+    with open(path, "r") as file:
+        data = json.load(file)
+
+    return {
+        "world_size": tuple(data["world_size"]),
+        "shapes": data["shapes"],
+        "shape_types": data["shape_types"],
+        "rules": load_rulesets(data),
+        "seed": data["fuzz"]["seed"],
+        "fuzz": data["fuzz"]
+    }
+
+FIXTURES = {
+    f"fixture_{os.path.splitext(os.path.basename(path))[0]}": (lambda path=path: load_fixture(path))
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json")))
+}
+
+def create_simulation(scenario, seed):
+    world_width, world_height = scenario["world_size"]
+    settings = {"default_x_gravity": 0, "default_y_gravity": 0, "max_shapes": scenario["shapes"]}
+
+    simulation = HeadlessSimulation(settings, world_width, world_height, SPRITES, scenario.get("seed", seed))
+    simulation.load_rules(scenario["rules"])
+
+    shape_types = scenario["shape_types"]
+    for n in range(scenario["shapes"]):
+        simulation.spawn(shape_types[n % len(shape_types)])
+
+    for shape in simulation.shapes:
+        shape.x_velocity = simulation.random.uniform(-2, 2)
+        shape.y_velocity = simulation.random.uniform(-2, 2)
+
+    simulation.triggered_events.append(["start", EMPTY_EVENT])
+
+    return simulation
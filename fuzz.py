@@ -0,0 +1,50 @@
+import argparse, hashlib, json, os
+
+from dataclasses import asdict
+
+from benchmarks.scenarios import FIXTURE_DIR, BASIC_SHAPES
+from benchmarks.fuzzer import fuzz, rule_names
+
+parser = argparse.ArgumentParser(description="Run random rule programs headless and save the ones that blow up as benchmark fixtures.")
+parser.add_argument("--programs", type=int, default=200, help="number of random programs to run")
+parser.add_argument("--seed", type=int, default=0, help="seed for the programs")
+parser.add_argument("--ticks", type=int, default=100, help="ticks to run every program for")
+parser.add_argument("--shapes", type=int, default=50, help="shapes in the world when a program starts")
+parser.add_argument("--event-budget", type=int, default=50000, help="events one tick may dispatch before it counts as an event storm")
+parser.add_argument("--tick-time", type=float, default=0.25, help="seconds one tick may take before it counts as a blowup")
+parser.add_argument("--output", default=FIXTURE_DIR, help="directory to save the minimized programs to")
+args = parser.parse_args()
+
+scenario = {"world_size": (1920, 1080), "shapes": args.shapes, "shape_types": BASIC_SHAPES}
+os.makedirs(args.output, exist_ok=True)
+
+found = set()
+saved = 0
+
+for program_seed, rules, (kind, detail, tick) in fuzz(args.programs, args.seed, scenario, args.ticks, args.event_budget, args.tick_time):
+    # Exceptions are told apart by their message, blowups by which rules are left after minimizing
+    signature = (kind, detail if kind.startswith("exception") else tuple(rule_names(rules)))
+    if signature in found:
+        continue
+    found.add(signature)
+
+    data = {
+        "rules": {rule_num: asdict(block) for rule_num, block in rules.items()},
+        "sprites": {},
+        "world_size": scenario["world_size"],
+        "shapes": scenario["shapes"],
+        "shape_types": scenario["shape_types"],
+        "fuzz": {"kind": kind, "detail": detail, "seed": program_seed, "ticks": tick + 1, "event_budget": args.event_budget, "tick_seconds": args.tick_time}
+    }
+
+    digest = hashlib.sha1(json.dumps(data["rules"], sort_keys=True).encode()).hexdigest()[:8]
+    path = os.path.join(args.output, f"{kind}_{digest}.json")
+
+    if not os.path.exists(path):
+        with open(path, "w") as file:
+            file.write(json.dumps(data, indent=4))
+        saved += 1
+
+    print(f"{kind} at tick {tick} ({', '.join(rule_names(rules))}): {detail}")
+
+print(f"{len(found)} distinct failures, {saved} new fixtures in {args.output}")
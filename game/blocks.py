@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from utils.constants import DO_RULES, IF_RULES, TRIGGER_RULES, FOR_RULES, RULE_DEFAULTS, VAR_TYPES, VAR_DEFAULT
+
+def get_rule_dict(rule_type):
+    if rule_type == "if":
+        return IF_RULES
+    elif rule_type == "for":
+        return FOR_RULES
+    elif rule_type == "trigger":
+        return TRIGGER_RULES
+    elif rule_type == "do":
+        return DO_RULES
+
+@dataclass
+class VarBlock:
+    x: float
+    y: float
+    label: str
+    var_type: str
+    connected_rule_num: str
+    value: str | int
+
+@dataclass
+class Block:
+    x: float
+    y: float
+    label: str
+    rule_type: str
+    rule: str
+    rule_num: int
+    vars: List["VarBlock"] = field(default_factory=list)
+    children: List["Block"] = field(default_factory=list)
+
+def new_block(rule_type, rule, rule_num, values=(), x=0, y=0):
+    user_vars = get_rule_dict(rule_type)[rule]["user_vars"]
+    values = list(values) + RULE_DEFAULTS[rule_type][rule][1][len(values):]
+
+    return Block(
+        x, y,
+        RULE_DEFAULTS[rule_type][rule][0],
+        rule_type,
+        rule,
+        rule_num,
+        [VarBlock(x, y, VAR_TYPES[var_type], var_type, rule_num, values[n]) for n, var_type in enumerate(user_vars)],
+        []
+    )
+
+# Values for variables that were added to a rule after files using it were saved, chosen to keep the old behaviour
+LEGACY_VAR_VALUES = {
+    ("collides", "contact"): "persist"
+}
+
+def dict_to_block(block_dict):
+    kwargs = block_dict.copy()
+    kwargs["children"] = [dict_to_block(child) for child in block_dict.get("children", [])]
+    kwargs["vars"] = [VarBlock(**var) for var in block_dict.get("vars", [])]
+    block = Block(**kwargs)
+
+    user_vars = get_rule_dict(block.rule_type)[block.rule]["user_vars"]
+    if len(block.vars) < len(user_vars):
+        for var_type in user_vars[len(block.vars):]:
+            value = LEGACY_VAR_VALUES.get((block.rule, var_type), VAR_DEFAULT[var_type])
+            block.vars.append(VarBlock(block.x, block.y, VAR_TYPES[var_type], var_type, block.rule_num, value))
+        block.label = RULE_DEFAULTS[block.rule_type][block.rule][0]
+
+    return block
+
+def load_rulesets(data):
+    return {int(rule_num): dict_to_block(ruleset) for rule_num, ruleset in data["rules"].items()}
+
+class BlockIndex():
+    # Every block of a forest by rule_num, with its parent (None for the roots). The editor updates it on each
+    # add, attach, detach and delete, so looking up a block or its parent doesn't walk the trees.
+    def __init__(self, rulesets):
+        self.rebuild(rulesets)
+
+    def rebuild(self, rulesets):
+        self.blocks = {}
+        self.parents = {}
+        # Highest rule_num added since the last rebuild, deleting blocks doesn't lower it so numbers aren't reused
+        self.max_rule_num = -1
+        # Roots by the order they were added or detached in, which is their order in the rulesets dict
+        self.root_order = {}
+        self.next_root_order = 0
+
+        for block in rulesets.values():
+            self.add(block)
+
+    def add(self, block, parent=None):
+        self.blocks[block.rule_num] = block
+        self.parents[block.rule_num] = parent
+        self.max_rule_num = max(self.max_rule_num, block.rule_num)
+
+        if parent is None:
+            self.add_root(block)
+
+        for child in block.children:
+            self.add(child, block)
+
+    def remove(self, block):
+        self.blocks.pop(block.rule_num, None)
+        self.parents.pop(block.rule_num, None)
+        self.root_order.pop(block.rule_num, None)
+
+        for child in block.children:
+            self.remove(child)
+
+    def add_root(self, block):
+        self.root_order[block.rule_num] = self.next_root_order
+        self.next_root_order += 1
+
+    def attach(self, block, parent):
+        self.parents[block.rule_num] = parent
+        self.root_order.pop(block.rule_num, None)
+
+    def detach(self, block):
+        self.parents[block.rule_num] = None
+        self.add_root(block)
+
+    def find(self, rule_num):
+        return self.blocks.get(rule_num)
+
+    def parent_of(self, rule_num):
+        return self.parents.get(rule_num)
+
+    def root_position(self, rule_num):
+        # Sorts like the root's index in the rulesets, without building a list of them
+        return self.root_order[rule_num]
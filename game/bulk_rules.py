@@ -0,0 +1,187 @@
+import numpy as np
+
+from utils.constants import OPS
+from game.events import ShapeEvent
+
+# FOR every_shape bodies made only of shape comparisons and per-shape actions run over the ShapeStore arrays
+# instead of once per shape: every IF narrows a boolean mask and every DO updates the masked shapes at once.
+# A shape's rules can only change that shape, so running each rule for all shapes before the next one gives the same
+# result as the interpreter. Events are queued in the order the interpreter would queue them.
+
+COMPARED_ARRAYS = {
+    "x_position_compare": "x",
+    "y_position_compare": "y",
+    "size_compare": "size",
+    "x_velocity_compare": "x_velocity",
+    "y_velocity_compare": "y_velocity",
+}
+
+BUCKET_RULES = {
+    "shape_type_is": "shapes_by_type",
+    "color_is": "shapes_by_color",
+}
+
+# action: (array, whether the value replaces or is added, event to queue)
+ARRAY_ACTIONS = {
+    "move_x": ("x", False, None),
+    "move_y": ("y", False, None),
+    "change_x": ("x", True, None),
+    "change_y": ("y", True, None),
+    "change_x_velocity": ("x_velocity", True, "x_velocity_change"),
+    "change_y_velocity": ("y_velocity", True, "y_velocity_change"),
+}
+
+OBJECT_ACTIONS = ("change_color", "change_size")
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def can_run_in_bulk(children):
+    for block in children:
+        values = [var.value for var in block.vars]
+
+        if block.rule_type == "if":
+            if block.rule in COMPARED_ARRAYS:
+                if not (values[0] in OPS and is_number(values[1])):
+                    return False
+            elif not block.rule in BUCKET_RULES:
+                return False
+
+            if not can_run_in_bulk(block.children):
+                return False
+
+        elif block.rule_type == "do":
+            if block.rule in ARRAY_ACTIONS:
+                if not is_number(values[0]):
+                    return False
+            elif not block.rule in OBJECT_ACTIONS:
+                return False
+
+        else:
+            return False
+
+    return True
+
+def bucket_mask(bucket, n):
+    mask = np.zeros(n, dtype=bool)
+    mask[np.fromiter((shape.store_index for shape in bucket), dtype=np.int64, count=len(bucket))] = True
+    return mask
+
+def compile_bulk_children(children, simulation):
+    compiled = [compile_bulk_block(child, simulation) for child in children]
+
+    def run_children(mask, emitted):
+        for child in compiled:
+            child(mask, emitted)
+
+    return run_children
+
+def compile_bulk_if(block, simulation):
+    store = simulation.shape_store
+    values = [var.value for var in block.vars]
+    body = compile_bulk_children(block.children, simulation)
+
+    if block.rule in COMPARED_ARRAYS:
+        name, op, value = COMPARED_ARRAYS[block.rule], OPS[values[0]], values[1]
+
+        def run_compare(mask, emitted):
+            mask = mask & op(getattr(store, name)[:len(mask)], value)
+            if mask.any():
+                body(mask, emitted)
+
+        return run_compare
+
+    buckets, value = getattr(store, BUCKET_RULES[block.rule]), values[0]
+
+    def run_bucket(mask, emitted):
+        bucket = buckets.get(value)
+        if not bucket:
+            return
+
+        mask = mask & bucket_mask(bucket, len(mask))
+        if mask.any():
+            body(mask, emitted)
+
+    return run_bucket
+
+def compile_bulk_do(block, simulation):
+    store = simulation.shape_store
+    value = block.vars[0].value
+
+    if block.rule in ARRAY_ACTIONS:
+        name, replace, trigger = ARRAY_ACTIONS[block.rule]
+        value = float(value)
+
+        def run_array_action(mask, emitted):
+            array = getattr(store, name)[:len(mask)]
+
+            if replace:
+                array[mask] = value
+            else:
+                array[mask] += value
+
+            if trigger is not None:
+                emitted.append((trigger, np.flatnonzero(mask)))
+
+        return run_array_action
+
+    trigger = "color_changes" if block.rule == "change_color" else "size_changes"
+
+    def run_object_action(mask, emitted):
+        indices = np.flatnonzero(mask)
+        shapes = store.shapes
+
+        # Colors and sizes also change how the shape is drawn, so these still go through the shape
+        for index in indices.tolist():
+            shape = shapes[index]
+            if block.rule == "change_color":
+                shape.shape_color = value
+            else:
+                shape.set_size(float(value))
+            store.refresh(shape)
+
+        emitted.append((trigger, indices))
+
+    return run_object_action
+
+def compile_bulk_block(block, simulation):
+    if block.rule_type == "if":
+        return compile_bulk_if(block, simulation)
+
+    return compile_bulk_do(block, simulation)
+
+def queue_events(emitted, shapes, queue):
+    if len(emitted) == 1:
+        trigger, indices = emitted[0]
+        queue.extend([trigger, ShapeEvent(shapes[index])] for index in indices.tolist())
+        return
+
+    # The interpreter runs the whole body for one shape before the next, so its events are ordered by shape first
+    triggers = [trigger for trigger, _ in emitted]
+    indices = np.concatenate([shape_indices for _, shape_indices in emitted])
+    orders = np.repeat(np.arange(len(emitted)), [len(shape_indices) for _, shape_indices in emitted])
+
+    ordered = np.lexsort((orders, indices))
+    for order, index in zip(orders[ordered].tolist(), indices[ordered].tolist()):
+        queue.append([triggers[order], ShapeEvent(shapes[index])])
+
+def compile_bulk_for(block, simulation):
+    if not can_run_in_bulk(block.children):
+        return None
+
+    store = simulation.shape_store
+    body = compile_bulk_children(block.children, simulation)
+
+    def run_bulk(event_args):
+        if not store.count:
+            return
+
+        if not simulation.event_dispatcher.count_rules(store.count):
+            return
+        emitted = []
+        body(np.ones(store.count, dtype=bool), emitted)
+
+        if emitted:
+            queue_events(emitted, store.shapes, simulation.triggered_events)
+
+    return run_bulk
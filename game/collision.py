@@ -0,0 +1,162 @@
+import numpy as np
+
+from game.shape_store import CIRCLE, RECTANGLE, TRIANGLE, TEXTURED_RECTANGLE
+
+# Batched versions of the narrow-phase methods in game/sprites.py. Every kernel takes two index arrays into a
+# ShapeStore and returns a boolean array, one entry per pair, matching the per-object methods.
+
+def point_in_triangle(px, py, x1, y1, x2, y2, x3, y3):
+    def sign(ax, ay, bx, by, cx, cy):
+        return (ax - cx) * (by - cy) - (bx - cx) * (ay - cy)
+
+    d1 = sign(px, py, x1, y1, x2, y2)
+    d2 = sign(px, py, x2, y2, x3, y3)
+    d3 = sign(px, py, x3, y3, x1, y1)
+
+    has_neg = (d1 < 0) | (d2 < 0) | (d3 < 0)
+    has_pos = (d1 > 0) | (d2 > 0) | (d3 > 0)
+
+    return ~(has_neg & has_pos)
+
+def segments_intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+    def ccw(ax, ay, bx, by, cx, cy):
+        return (cy - ay) * (bx - ax) > (by - ay) * (cx - ax)
+
+    return ((ccw(x1, y1, x3, y3, x4, y4) != ccw(x2, y2, x3, y3, x4, y4)) &
+            (ccw(x1, y1, x2, y2, x3, y3) != ccw(x1, y1, x2, y2, x4, y4)))
+
+def distance_to_segment(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+
+    length_squared = dx * dx + dy * dy
+    degenerate = length_squared == 0
+
+    t = np.clip(((px - x1) * dx + (py - y1) * dy) / np.where(degenerate, 1, length_squared), 0, 1)
+    t = np.where(degenerate, 0, t)
+
+    closest_x = x1 + t * dx
+    closest_y = y1 + t * dy
+
+    return np.sqrt((px - closest_x)**2 + (py - closest_y)**2)
+
+def circle_geometry(store, indices):
+    return store.x[indices], store.y[indices], store.extent[indices, 0]
+
+def rectangle_geometry(store, indices):
+    return store.x[indices], store.y[indices], store.extent[indices, 0], store.extent[indices, 1]
+
+def triangle_vertices(store, indices):
+    x, y, extent = store.x[indices], store.y[indices], store.extent[indices]
+    return [(x, y), (x + extent[:, 0], y + extent[:, 1]), (x + extent[:, 2], y + extent[:, 3])]
+
+def triangle_edges(vertices):
+    return [(*vertices[n], *vertices[(n + 1) % 3]) for n in range(3)]
+
+def circles_collide(store, a, b):
+    ax, ay, a_radius = circle_geometry(store, a)
+    bx, by, b_radius = circle_geometry(store, b)
+
+    dx = ax - bx
+    dy = ay - by
+    return np.sqrt(dx * dx + dy * dy) < (a_radius + b_radius)
+
+def circle_rectangle_collide(store, circles, rectangles):
+    cx, cy, radius = circle_geometry(store, circles)
+    rx, ry, width, height = rectangle_geometry(store, rectangles)
+
+    closest_x = np.maximum(rx, np.minimum(cx, rx + width))
+    closest_y = np.maximum(ry, np.minimum(cy, ry + height))
+
+    dx = cx - closest_x
+    dy = cy - closest_y
+    return np.sqrt(dx * dx + dy * dy) < radius
+
+def circle_triangle_collide(store, circles, triangles):
+    cx, cy, radius = circle_geometry(store, circles)
+    vertices = triangle_vertices(store, triangles)
+
+    hits = point_in_triangle(cx, cy, *vertices[0], *vertices[1], *vertices[2])
+    for edge in triangle_edges(vertices):
+        hits |= distance_to_segment(cx, cy, *edge) < radius
+
+    return hits
+
+def rectangles_collide(store, a, b):
+    ax, ay, a_width, a_height = rectangle_geometry(store, a)
+    bx, by, b_width, b_height = rectangle_geometry(store, b)
+
+    return ((ax < bx + b_width) &
+            (ax + a_width > bx) &
+            (ay < by + b_height) &
+            (ay + a_height > by))
+
+def rectangle_triangle_collide(store, rectangles, triangles):
+    rx, ry, width, height = rectangle_geometry(store, rectangles)
+    vertices = triangle_vertices(store, triangles)
+
+    hits = np.zeros(len(rectangles), dtype=bool)
+
+    for vx, vy in vertices:
+        hits |= (rx <= vx) & (vx <= rx + width) & (ry <= vy) & (vy <= ry + height)
+
+    rect_vertices = [(rx, ry), (rx + width, ry), (rx + width, ry + height), (rx, ry + height)]
+    for px, py in rect_vertices:
+        hits |= point_in_triangle(px, py, *vertices[0], *vertices[1], *vertices[2])
+
+    rect_edges = [(*rect_vertices[n], *rect_vertices[(n + 1) % 4]) for n in range(4)]
+    for t_edge in triangle_edges(vertices):
+        for r_edge in rect_edges:
+            hits |= segments_intersect(*t_edge, *r_edge)
+
+    return hits
+
+def triangles_collide(store, a, b):
+    vertices_a = triangle_vertices(store, a)
+    vertices_b = triangle_vertices(store, b)
+
+    hits = np.zeros(len(a), dtype=bool)
+
+    for vx, vy in vertices_a:
+        hits |= point_in_triangle(vx, vy, *vertices_b[0], *vertices_b[1], *vertices_b[2])
+
+    for vx, vy in vertices_b:
+        hits |= point_in_triangle(vx, vy, *vertices_a[0], *vertices_a[1], *vertices_a[2])
+
+    for e1 in triangle_edges(vertices_a):
+        for e2 in triangle_edges(vertices_b):
+            hits |= segments_intersect(*e1, *e2)
+
+    return hits
+
+KERNELS = {
+    (CIRCLE, CIRCLE): circles_collide,
+    (CIRCLE, RECTANGLE): circle_rectangle_collide,
+    (CIRCLE, TRIANGLE): circle_triangle_collide,
+    (RECTANGLE, RECTANGLE): rectangles_collide,
+    (RECTANGLE, TRIANGLE): rectangle_triangle_collide,
+    (TRIANGLE, TRIANGLE): triangles_collide,
+}
+
+def collision_kind(type_id):
+    return np.where(type_id == TEXTURED_RECTANGLE, RECTANGLE, type_id)
+
+def colliding_pairs(store, a, b):
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+
+    a_kind = collision_kind(store.type_id[a])
+    b_kind = collision_kind(store.type_id[b])
+
+    # Each kernel expects its pair in (lower kind, higher kind) order, like the per-object methods delegate
+    swapped = a_kind > b_kind
+    first, second = np.where(swapped, b, a), np.where(swapped, a, b)
+    first_kind, second_kind = np.minimum(a_kind, b_kind), np.maximum(a_kind, b_kind)
+
+    hits = np.zeros(len(a), dtype=bool)
+    for (kind, other_kind), kernel in KERNELS.items():
+        selected = np.flatnonzero((first_kind == kind) & (second_kind == other_kind))
+        if len(selected):
+            hits[selected] = kernel(store, first[selected], second[selected])
+
+    return a[hits], b[hits]
@@ -0,0 +1,60 @@
+import numpy as np
+
+# Remembers which pairs of shapes were touching on the last collision check, so collisions can be reported as
+# contacts beginning, persisting and ending instead of one event per pair every tick.
+
+def contact_keys(store, a, b):
+    serial_a, serial_b = store.serial[a], store.serial[b]
+    return (np.minimum(serial_a, serial_b) << 32) | np.maximum(serial_a, serial_b)
+
+class RemovedShape():
+    # Stands in for the other shape of a contact that ended because that shape was destroyed
+    alive = False
+    serial = -1
+
+    def __init__(self, shape_type):
+        self.shape_type = shape_type
+
+class ContactTracker():
+    def __init__(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.pairs = {}
+
+    def clear(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.pairs = {}
+
+    def update(self, store, a, b):
+        # Returns the (shape, other shape) pairs that started and stopped touching, and the store indexes of the
+        # pairs that were already touching
+        keys, first = np.unique(contact_keys(store, a, b), return_index=True)
+        a, b = a[first], b[first]
+
+        began = ~np.isin(keys, self.keys, assume_unique=True)
+        ended_keys = self.keys[~np.isin(self.keys, keys, assume_unique=True)]
+
+        shapes = store.shapes
+        begins = [(shapes[i], shapes[j]) for i, j in zip(a[began].tolist(), b[began].tolist())]
+        self.pairs.update((key, (shape, shape_b, shape_b.shape_type)) for key, (shape, shape_b) in zip(keys[began].tolist(), begins))
+
+        self.keys = keys
+        return begins, (a[~began], b[~began]), self.resolve_ends(ended_keys.tolist())
+
+    def resolve_ends(self, ended_keys):
+        # The pair's shapes may have been destroyed and their objects reused by the ShapePool since the contact
+        # began, so each is checked against the serials in the key. A pair whose first shape is gone is dropped,
+        # the event would be about that shape, and a gone second shape is replaced by a RemovedShape.
+        ends = []
+
+        for key in ended_keys:
+            shape, shape_b, shape_b_type = self.pairs.pop(key)
+            serials = (key >> 32, key & 0xFFFFFFFF)
+
+            if not shape.serial in serials:
+                continue
+            if not shape_b.serial in serials:
+                shape_b = RemovedShape(shape_b_type)
+
+            ends.append((shape, shape_b))
+
+        return ends
@@ -0,0 +1,168 @@
+from collections import deque
+from time import perf_counter
+
+class EventDispatcher():
+    def __init__(self, max_events=0, max_rules=0, max_seconds=0):
+        self.queue = deque()
+        self.rules_by_trigger = {}
+
+        # Events, trigger rule runs and seconds one tick may use (0 for no limit), the rest waits for the next tick.
+        # Game sets max_seconds, headless runs leave it off so they stay the same on every machine.
+        self.max_events = max_events or float("inf")
+        self.max_rules = max_rules or float("inf")
+        self.max_seconds = max_seconds or float("inf")
+        self.rule_deadline = float("inf")
+
+        # Events over the budget wait in one line per trigger type, served in turns so a storm of one type
+        # can't starve the others
+        self.deferred = {}
+        self.turns = deque()
+
+        self.rules_run = 0 # trigger rules and FOR loop bodies run in the current tick
+        self.skipped_loops = 0 # FOR loops skipped in the current tick because the rules budget was used up
+        self.deferred_count = 0 # events left waiting after the last tick
+        self.overflow_ticks = 0
+        self.total_deferred = 0
+        self.total_skipped_loops = 0
+
+    def load(self, compiled_rules):
+        self.rules_by_trigger = {}
+
+        for trigger_key in {trigger_key for trigger_key, _, _ in compiled_rules}:
+            rules = [(shape_type, run) for key, shape_type, run in compiled_rules if key == trigger_key]
+            unfiltered = [run for shape_type, run in rules if shape_type is None]
+
+            # Every shape type gets its own list of the rules that can match it, kept in rule order
+            by_shape_type = {None: unfiltered}
+            for shape_type in {shape_type for shape_type, _ in rules if shape_type is not None}:
+                by_shape_type[shape_type] = [run for rule_shape_type, run in rules if rule_shape_type in (None, shape_type)]
+
+            self.rules_by_trigger[trigger_key] = by_shape_type
+
+    def clear(self):
+        self.queue.clear()
+        self.deferred.clear()
+        self.turns.clear()
+        self.deferred_count = 0
+
+    def has_rules(self, trigger_key):
+        return trigger_key in self.rules_by_trigger
+
+    def matching_rules(self, trigger, event_args):
+        by_shape_type = self.rules_by_trigger.get(trigger)
+        if by_shape_type is None:
+            return ()
+
+        return by_shape_type.get(event_args.match_type, by_shape_type[None])
+
+    def count_rules(self, rules_run):
+        # FOR loops report how many shapes their body will run for before they start, so a loop over many shapes
+        # uses up the budget too. Once it's used up they are skipped: the rest of a rule run can't wait for the next
+        # tick like an event, and a loop inside a loop that spawns shapes would otherwise grow without bound.
+        if self.rules_run >= self.max_rules or perf_counter() > self.rule_deadline:
+            self.skipped_loops += 1
+            return False
+
+        self.rules_run += rules_run
+        return True
+
+    def dispatch(self, trigger, event_args):
+        for run_trigger in self.matching_rules(trigger, event_args):
+            run_trigger(event_args)
+
+    def defer_queue(self):
+        # Moves the queued events to the back of their trigger type's line
+        deferred, turns = self.deferred, self.turns
+
+        for event in self.queue:
+            line = deferred.get(event[0])
+            if line is None:
+                line = deferred[event[0]] = deque()
+                turns.append(event[0])
+            line.append(event)
+
+        self.queue.clear()
+
+    def next_deferred(self):
+        # New events join the lines first, then the next trigger type in turn gives up its oldest event
+        if self.queue:
+            self.defer_queue()
+
+        trigger = self.turns.popleft()
+        line = self.deferred[trigger]
+        event = line.popleft()
+
+        if line:
+            self.turns.append(trigger)
+        else:
+            del self.deferred[trigger]
+
+        return event
+
+    def end_tick(self):
+        self.defer_queue()
+        self.deferred_count = sum(len(line) for line in self.deferred.values())
+
+        if self.deferred_count or self.skipped_loops:
+            self.overflow_ticks += 1
+            self.total_deferred += self.deferred_count
+            self.total_skipped_loops += self.skipped_loops
+
+    def run(self, phase_timer=None):
+        if phase_timer is not None:
+            return self.run_timed(phase_timer)
+
+        queue, deferred = self.queue, self.deferred
+        max_events, max_rules = self.max_events, self.max_rules
+        events = self.rules_run = self.skipped_loops = 0
+        deadline = self.rule_deadline = perf_counter() + self.max_seconds
+
+        while (queue or deferred) and events < max_events and self.rules_run < max_rules and perf_counter() < deadline:
+            trigger, event_args = self.next_deferred() if deferred else queue.popleft()
+
+            shape = event_args.shape
+            if shape is not None and shape.serial != event_args.serial: # shape was destroyed (and maybe reused) after the event was queued
+                continue
+
+            rules = self.matching_rules(trigger, event_args)
+            events += 1
+            self.rules_run += len(rules)
+
+            for run_trigger in rules:
+                run_trigger(event_args)
+
+        self.end_tick()
+
+    def run_timed(self, phase_timer):
+        queue, deferred = self.queue, self.deferred
+        max_events, max_rules = self.max_events, self.max_rules
+        events = self.rules_run = self.skipped_loops = 0
+        start = perf_counter()
+        deadline = self.rule_deadline = start + self.max_seconds
+        rule_time = 0.0
+
+        while (queue or deferred) and events < max_events and self.rules_run < max_rules and perf_counter() < deadline:
+            trigger, event_args = self.next_deferred() if deferred else queue.popleft()
+
+            shape = event_args.shape
+            if shape is not None and shape.serial != event_args.serial:
+                continue
+
+            rules = self.matching_rules(trigger, event_args)
+            phase_timer.count_event(trigger, len(rules))
+            events += 1
+            self.rules_run += len(rules)
+            if not rules:
+                continue
+
+            rule_start = perf_counter()
+            for run_trigger in rules:
+                run_trigger(event_args)
+            rule_time += perf_counter() - rule_start
+
+        self.end_tick()
+        phase_timer.count_deferred(self.deferred_count, self.skipped_loops)
+
+        phase_timer.add("rule_execution", rule_time)
+        phase_timer.add("event_dispatch", perf_counter() - start - rule_time)
+        phase_timer.mark()
@@ -0,0 +1,97 @@
+# What the rules get to read about the event that triggered them. Shape events only keep the shape and read its
+# attributes when a rule asks for them, so queuing an event or running a FOR loop body doesn't build dicts.
+
+class EventRecord():
+    __slots__ = ()
+
+    shape = None
+    # ShapeStore serial of the shape when the event was made, the shape object can be reused for a new shape later
+    serial = None
+    # Shape type the dispatcher uses to pick the rules that can match
+    match_type = None
+
+class KeyEvent(EventRecord):
+    __slots__ = ("event_key",)
+
+    def __init__(self, event_key):
+        self.event_key = event_key
+
+class DestroyedEvent(EventRecord):
+    __slots__ = ("event_shape_type",)
+
+    def __init__(self, event_shape_type):
+        self.event_shape_type = event_shape_type
+
+    @property
+    def match_type(self):
+        return self.event_shape_type
+
+class ShapeEvent(EventRecord):
+    __slots__ = ("shape", "serial")
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.serial = shape.serial
+
+    @property
+    def match_type(self):
+        return self.shape.shape_type
+
+    @property
+    def event_shape_type(self):
+        return self.shape.shape_type
+
+    @property
+    def shape_size(self):
+        return self.shape.shape_size
+
+    @property
+    def shape_x(self):
+        return self.shape.x
+
+    @property
+    def shape_y(self):
+        return self.shape.y
+
+    @property
+    def shape_x_velocity(self):
+        return self.shape.x_velocity
+
+    @property
+    def shape_y_velocity(self):
+        return self.shape.y_velocity
+
+    @property
+    def shape_color(self):
+        return self.shape.shape_color
+
+class CollisionEvent(ShapeEvent):
+    __slots__ = ("shape_b", "event_contact")
+
+    def __init__(self, shape, shape_b, event_contact):
+        self.shape = shape
+        self.serial = shape.serial
+        self.shape_b = shape_b
+        self.event_contact = event_contact
+
+    @property
+    def event_a_type(self):
+        return self.shape.shape_type
+
+    @property
+    def event_b_type(self):
+        return self.shape_b.shape_type
+
+class ShapeContext(ShapeEvent):
+    # The current shape of a FOR loop. One is reused for every shape of the loop, anything that isn't about the
+    # shape comes from the event that started the loop.
+    __slots__ = ("trigger",)
+
+    def __init__(self, trigger):
+        self.shape = None
+        self.trigger = trigger
+
+    def __getattr__(self, name):
+        return getattr(self.trigger, name)
+
+EMPTY_EVENT = EventRecord()
@@ -0,0 +1,24 @@
+import numpy as np
+
+# Which shapes get destroyed first once there are more than max_shapes. Every policy gives each shape a key and the
+# shapes with the lowest keys are evicted, see ShapeStore.lowest.
+
+def oldest_keys(store, center, rng):
+    return store.serial[:store.count]
+
+def farthest_keys(store, center, rng):
+    n = store.count
+    return -np.hypot(store.x[:n] - center[0], store.y[:n] - center[1])
+
+def smallest_keys(store, center, rng):
+    return store.size[:store.count]
+
+def random_keys(store, center, rng):
+    return rng.random(store.count)
+
+EVICTION_POLICIES = {
+    "Oldest": oldest_keys,
+    "Farthest": farthest_keys,
+    "Smallest": smallest_keys,
+    "Random": random_keys
+}
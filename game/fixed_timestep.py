@@ -0,0 +1,33 @@
+SPEEDS = [0.125, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0]
+
+class FixedTimestep():
+    def __init__(self, ticks_per_second=60, max_ticks_per_frame=5):
+        self.step = 1 / ticks_per_second
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.speed = 1.0
+        self.accumulator = 0.0
+
+    def advance(self, delta_time):
+        self.accumulator += delta_time * self.speed
+
+        ticks = int(self.accumulator / self.step)
+
+        if ticks > self.max_ticks_per_frame:
+            # The machine can't keep up, so drop the backlog instead of falling further and further behind
+            ticks = self.max_ticks_per_frame
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks * self.step
+
+        return ticks
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.step, 1.0)
+
+    def change_speed(self, direction):
+        index = min(max(SPEEDS.index(self.speed) + direction, 0), len(SPEEDS) - 1) if self.speed in SPEEDS else SPEEDS.index(1.0)
+        self.speed = SPEEDS[index]
+
+    def reset(self):
+        self.accumulator = 0.0
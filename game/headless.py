@@ -0,0 +1,141 @@
+import arcade.color
+
+from utils.texture_cache import texture_cache
+from game.simulation import Simulation
+from game.events import EMPTY_EVENT
+from game.shape_store import stored_attribute, CIRCLE, RECTANGLE, TRIANGLE, TEXTURED_RECTANGLE
+
+# Shapes with just the state the rules and the ShapeStore need, so the simulation can run without a window,
+# GL context or pyglet batch.
+
+class VirtualShape():
+    store = None
+    store_index = -1
+    serial = -1 # set by the ShapeStore while the shape is in it
+
+    x = stored_attribute("x")
+    y = stored_attribute("y")
+    x_velocity = stored_attribute("x_velocity")
+    y_velocity = stored_attribute("y_velocity")
+
+    def __init__(self, shape_type, x, y, x_velocity, y_velocity):
+        self.shape_type = shape_type
+        self.alive = True
+
+        self.x, self.y = x, y
+        self.x_velocity, self.y_velocity = x_velocity, y_velocity
+        self.shape_color = "WHITE"
+
+    @property
+    def shape_color(self):
+        return self._shape_color
+
+    @shape_color.setter
+    def shape_color(self, color):
+        self._shape_color = color
+        self.color = getattr(arcade.color, color)
+
+    def delete(self):
+        pass
+
+class VirtualCircle(VirtualShape):
+    type_id = CIRCLE
+
+    def __init__(self, x, y, radius, x_velocity, y_velocity):
+        super().__init__("circle", x, y, x_velocity, y_velocity)
+        self.radius = radius
+
+    @property
+    def shape_size(self):
+        return self.radius
+
+    @property
+    def extent(self):
+        return self.radius, 0, 0, 0
+
+    def set_size(self, size):
+        self.radius = size
+
+class VirtualRectangle(VirtualShape):
+    type_id = RECTANGLE
+
+    def __init__(self, shape_type, x, y, width, height, x_velocity, y_velocity):
+        super().__init__(shape_type, x, y, x_velocity, y_velocity)
+        self.width, self.height = width, height
+
+        if shape_type != "rectangle":
+            self.type_id = TEXTURED_RECTANGLE
+
+    @property
+    def shape_size(self):
+        return self.width
+
+    @property
+    def extent(self):
+        return self.width, self.height, 0, 0
+
+    def set_size(self, size):
+        self.width = size
+        self.height = size
+
+class VirtualTriangle(VirtualShape):
+    type_id = TRIANGLE
+
+    # Like game.sprites.Triangle, the second and third vertex are offsets from (x, y)
+    def __init__(self, x, y, offsets, x_velocity, y_velocity):
+        super().__init__("triangle", x, y, x_velocity, y_velocity)
+        self.offsets = offsets
+
+    @property
+    def shape_size(self):
+        return max(0, self.offsets[0], self.offsets[2]) - min(0, self.offsets[0], self.offsets[2])
+
+    @property
+    def extent(self):
+        return self.offsets
+
+    def set_size(self, size):
+        current_size = self.shape_size
+
+        if current_size:
+            self.offsets = tuple(offset * size / current_size for offset in self.offsets)
+        else:
+            self.offsets = (size, 0, size / 2, size)
+
+class HeadlessSimulation(Simulation):
+    def __init__(self, settings, world_width, world_height, sprite_types, seed=None):
+        super().__init__(settings, world_width, world_height, seed)
+
+        self.sprite_types = sprite_types
+
+    def sprite_size(self, shape_type):
+        return texture_cache.image(self.sprite_types[shape_type]).size
+
+    def create_shape(self, shape_type, x, y):
+        x_velocity = self.settings.get("default_x_velocity", 0)
+        y_velocity = self.settings.get("default_y_velocity", 0)
+
+        if shape_type == "circle":
+            return VirtualCircle(x, y, 10, x_velocity, y_velocity)
+
+        elif shape_type == "rectangle":
+            return VirtualRectangle("rectangle", x, y, 10, 10, x_velocity, y_velocity)
+
+        elif shape_type == "triangle":
+            return VirtualTriangle(x, y, (10, 0, 5, 10), x_velocity, y_velocity)
+
+        return VirtualRectangle(shape_type, x, y, *self.sprite_size(shape_type), x_velocity, y_velocity)
+
+    def run(self, ticks):
+        self.triggered_events.append(["start", EMPTY_EVENT])
+
+        for _ in range(ticks):
+            self.tick()
+
+    def shape_counts(self):
+        counts = {}
+
+        for shape in self.shapes:
+            counts[shape.shape_type] = counts.get(shape.shape_type, 0) + 1
+
+        return counts
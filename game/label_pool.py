@@ -0,0 +1,51 @@
+import arcade, pyglet
+
+# Labels that are no longer needed are hidden and handed out again for the next label with the same style,
+# so rebuilding blocks doesn't keep creating and deleting text layouts. Hidden labels still take up room in the batch,
+# so only a limited number are kept per style.
+
+class LabelPool():
+    def __init__(self, batch, group, capacity_per_style=256):
+        self.batch = batch
+        self.group = group
+        self.capacity_per_style = capacity_per_style
+        self.free = {}
+
+    def acquire(self, text, x, y, font_size, weight="normal", anchor_x="left", anchor_y="baseline"):
+        style = (font_size, weight, anchor_x, anchor_y)
+        free = self.free.get(style)
+
+        if free:
+            label = free.pop()
+            label.begin_update()
+            label.text = text
+            label.position = (x, y, 0)
+            label.visible = True
+            label.end_update()
+            return label
+
+        label = pyglet.text.Label(
+            text=text,
+            x=x,
+            y=y,
+            color=arcade.color.BLACK,
+            font_size=font_size,
+            weight=weight,
+            anchor_x=anchor_x,
+            anchor_y=anchor_y,
+            batch=self.batch,
+            group=self.group
+        )
+        label.pool_style = style
+
+        return label
+
+    def release(self, label):
+        free = self.free.setdefault(label.pool_style, [])
+
+        if len(free) >= self.capacity_per_style:
+            label.delete()
+            return
+
+        label.visible = False
+        free.append(label)
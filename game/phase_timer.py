@@ -0,0 +1,85 @@
+from time import perf_counter
+
+PHASES = ("event_dispatch", "rule_execution", "integration", "collision", "culling")
+
+class PhaseTimer():
+    def __init__(self):
+        self.ticks = 0
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.maximums = dict.fromkeys(PHASES, 0.0)
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.last = dict.fromkeys(PHASES, 0.0)
+        self.mark_time = perf_counter()
+
+        # How many events of each trigger type were processed, and how many trigger rules they ran
+        self.event_counts = {}
+        self.rules_evaluated = 0
+        self.total_event_counts = {}
+        self.total_rules_evaluated = 0
+
+        # Events left over the per-tick budget for the next tick, and how many ticks went over it
+        self.deferred = 0
+        self.total_deferred = 0
+        self.skipped_loops = 0
+        self.total_skipped_loops = 0
+        self.overflow_ticks = 0
+
+    def begin(self):
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.event_counts = {}
+        self.rules_evaluated = 0
+        self.deferred = 0
+        self.skipped_loops = 0
+        self.mark_time = perf_counter()
+
+    def mark(self):
+        self.mark_time = perf_counter()
+
+    def lap(self, phase):
+        now = perf_counter()
+        self.current[phase] += now - self.mark_time
+        self.mark_time = now
+
+    def add(self, phase, seconds):
+        self.current[phase] += seconds
+
+    def count_event(self, trigger, rules_run):
+        self.event_counts[trigger] = self.event_counts.get(trigger, 0) + 1
+        self.rules_evaluated += rules_run
+
+    def count_deferred(self, deferred, skipped_loops=0):
+        self.deferred = deferred
+        self.skipped_loops = skipped_loops
+
+    def end(self):
+        self.ticks += 1
+
+        for phase, seconds in self.current.items():
+            self.totals[phase] += seconds
+            self.maximums[phase] = max(self.maximums[phase], seconds)
+
+        self.last = self.current
+
+        for trigger, count in self.event_counts.items():
+            self.total_event_counts[trigger] = self.total_event_counts.get(trigger, 0) + count
+        self.total_rules_evaluated += self.rules_evaluated
+
+        if self.deferred or self.skipped_loops:
+            self.total_deferred += self.deferred
+            self.total_skipped_loops += self.skipped_loops
+            self.overflow_ticks += 1
+
+    def summary(self):
+        ticks = max(self.ticks, 1)
+
+        return {
+            phase: {
+                "total_seconds": self.totals[phase],
+                "mean_ms": self.totals[phase] / ticks * 1000,
+                "max_ms": self.maximums[phase] * 1000
+            }
+            for phase in PHASES
+        }
+
+    def event_summary(self):
+        return {"events": dict(sorted(self.total_event_counts.items())), "rules_evaluated": self.total_rules_evaluated, "deferred_events": self.total_deferred, "skipped_loops": self.total_skipped_loops, "overflow_ticks": self.overflow_ticks}
@@ -1,15 +1,23 @@
-import arcade, arcade.gui, pyglet, random, json
+import arcade, arcade.gui, pyglet, json, os, datetime
 
 from dataclasses import asdict
+from time import perf_counter
 
-from utils.preload import SPRITE_TEXTURES, button_texture, button_hovered_texture
-from utils.constants import button_style, DO_RULES, IF_RULES, SPRITES, ALLOWED_INPUT
+from utils.preload import button_texture, button_hovered_texture
+from utils.texture_cache import texture_cache
+from utils.constants import button_style, SPRITES, ALLOWED_INPUT, profile_dir
 
-from game.rules import RuleUI, Block, VarBlock
-from game.sprites import BaseRectangle, BaseShape, Rectangle, Circle, Triangle, TexturedRectangle
+from game.rules import RuleUI
+from game.blocks import load_rulesets
+from game.sprites import Rectangle, Circle, Triangle, TexturedRectangle
 from game.file_manager import FileManager
+from game.simulation import Simulation
+from game.profiler import FrameProfiler
+from game.fixed_timestep import FixedTimestep
+from game.shape_pool import ShapePool
+from game.events import EMPTY_EVENT, KeyEvent
 
-class Game(arcade.gui.UIView):
+class Game(arcade.gui.UIView, Simulation):
     def __init__(self, pypresence_client):
         super().__init__()
 
@@ -37,11 +45,10 @@ class Game(arcade.gui.UIView):
         self.add_ui_selector("Export", lambda event: self.export_file())
         self.mode = "simulation"
 
-        self.x_gravity = self.settings.get("default_x_gravity", 0)
-        self.y_gravity = self.settings.get("default_y_gravity", 5)
-        self.triggered_events = []
+        Simulation.__init__(self, self.settings, self.window.width, self.window.height)
 
         self.rulesets = self.rules_box.rulesets
+        self.load_rules(self.rulesets)
 
         self.sprite_add_filemanager = FileManager(self.window.width * 0.9, self.window.height * 0.75, (0.9, 0.75), [".png", ".jpg", ".jpeg", ".bmp", ".gif"])
         self.sprite_add_filemanager.change_mode("import")
@@ -57,125 +64,66 @@ class Game(arcade.gui.UIView):
         self.sprites_ui = arcade.gui.UIAnchorLayout(size_hint=(0.95, 0.9))
         self.sprite_types = SPRITES
 
-        self.shapes = []
         self.shape_batch = pyglet.graphics.Batch()
+        self.shape_pool = ShapePool(self.settings.get("max_shapes", 120))
 
-        self.simulation()
+        self.timestep = FixedTimestep(self.settings.get("ticks_per_second", 60), self.settings.get("max_catch_up_ticks", 5))
+        # Only the game gives rules a time budget per tick, so headless runs stay deterministic
+        self.event_dispatcher.max_seconds = self.settings.get("max_rule_time_ms", 10) / 1000
+        self.speed_text = arcade.Text("", self.window.width - 10, self.window.height - 10, arcade.color.WHITE, 16, anchor_x="right", anchor_y="top")
 
-    def add_ui_selector(self, button_text, on_click):
-        button = self.ui_selector_box.add(arcade.gui.UITextureButton(text=button_text, width=self.window.width / 5.5, height=self.window.height / 15, style=button_style, texture=button_texture, texture_hovered=button_hovered_texture))
-        button.on_click = on_click
+        self.profiler = FrameProfiler()
+        self.profiler_overlay = self.settings.get("profiler_overlay", False)
+        self.profiler_text = arcade.Text("", 10, self.window.height - 10, arcade.color.WHITE, 12, width=self.window.width // 3, multiline=True, anchor_y="top", font_name=("Courier New", "DejaVu Sans Mono", "Liberation Mono"))
+        self.profiler_text_tick = -1
 
-    def move_x(self, a, shape):
-        a = float(a)
-        if isinstance(shape, Triangle):
-            shape.x += a
-            shape.x2 += a
-            shape.x3 += a
-        else:
-            shape.x += a
-
-    def move_y(self, a, shape):
-        a = float(a)
-        if isinstance(shape, Triangle):
-            shape.y += a
-            shape.y2 += a
-            shape.y3 += a
-        else:
-            shape.y += a
+        profiler_export = self.settings.get("profiler_export", "Off")
+        if not profiler_export == "Off":
+            os.makedirs(profile_dir, exist_ok=True)
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            self.profiler.start_export(os.path.join(profile_dir, f"profile_{timestamp}.{profiler_export.lower()}"), profiler_export)
 
-    def change_x(self, a, shape):
-        a = float(a)
-        if isinstance(shape, Triangle):
-            offset_x2 = shape.x2 - shape.x
-            offset_x3 = shape.x3 - shape.x
-            
-            shape.x = a
-            shape.x2 = a + offset_x2
-            shape.x3 = a + offset_x3
-        else:
-            shape.x = a
-    
-    def change_y(self, a, shape):
-        a = float(a)
-        if isinstance(shape, Triangle):
-            offset_y2 = shape.y2 - shape.y
-            offset_y3 = shape.y3 - shape.y
-            
-            shape.y = a
-            shape.y2 = a + offset_y2
-            shape.y3 = a + offset_y3
+            # Closing the window never reaches main_exit, so the export is closed there too
+            self.window.push_handlers(on_close=self.close_profiler)
+
+        self.update_phase_timer()
+
+        self.simulation()
+
+    def update_phase_timer(self):
+        # Timing every event has a cost, so only do it while someone is looking at the results
+        if self.profiler_overlay or self.profiler.export_file is not None:
+            self.phase_timer = self.profiler
         else:
-            shape.y = a
-
-    def change_x_velocity(self, a, shape):
-        a = float(a)
-        shape.x_velocity = a
-        self.triggered_events.append(["x_velocity_change", {"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color}])
-
-    def change_y_velocity(self, a, shape):
-        a = float(a)
-        shape.y_velocity = a
-        self.triggered_events.append(["y_velocity_change", {"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color}])
-
-    def change_x_gravity(self, a):
-        a = float(a)
-        self.x_gravity = a
-        self.triggered_events.append(["x_gravity_change", {}])
-
-    def change_y_gravity(self, a):
-        a = float(a)
-        self.y_gravity = a
-        self.triggered_events.append(["y_gravity_change", {}])
-
-    def change_color(self, a, shape):
-        shape.shape_color = getattr(arcade.color, a)
-        self.triggered_events.append(["color_change", {"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color}])
-
-    def destroy(self, shape: BaseShape):
-        self.triggered_events.append(["destroyed", {"event_shape_type": shape.shape_type}])
-        if shape in self.shapes:
-            self.shapes.remove(shape)
-            shape.delete()
-
-    def change_size(self, a, shape):
-        a = float(a)
-        if isinstance(shape, Circle):
-            shape.radius = a
-        elif isinstance(shape, BaseRectangle):
-            shape.width = a
-            shape.height = a
-        elif isinstance(shape, Triangle):
-            size = a - shape.shape_size
-
-            shape.x += size
-            shape.y += size
-            
-            shape.x2 += size
-            shape.y2 += size
+            self.phase_timer = None
 
-            shape.x3 += size
-            shape.y3 += size
+    def toggle_profiler_overlay(self):
+        self.profiler_overlay = not self.profiler_overlay
+        self.update_phase_timer()
 
-        self.triggered_events.append(["size_change", {"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color}])
+    def add_ui_selector(self, button_text, on_click):
+        button = self.ui_selector_box.add(arcade.gui.UITextureButton(text=button_text, width=self.window.width / 5.5, height=self.window.height / 15, style=button_style, texture=button_texture, texture_hovered=button_hovered_texture))
+        button.on_click = on_click
 
-    def spawn(self, shape_type):
-        x, y = random.randint(int(self.window.width * 0.15) + 50, int(self.window.width * 0.75) - 50), random.randint(100, self.window.height - 100)
+    def create_shape(self, shape_type, x, y):
+        shape = self.shape_pool.acquire(shape_type)
+        if shape is not None:
+            shape.reuse(x, y)
+            return shape
 
         if shape_type == "circle":
-            self.shapes.append(Circle(x, y, 10, color=arcade.color.WHITE, batch=self.shape_batch))
+            return Circle(x, y, 10, color=arcade.color.WHITE, batch=self.shape_batch)
 
         elif shape_type == "rectangle":
-            self.shapes.append(Rectangle(x, y, width=10, height=10, color=arcade.color.WHITE, batch=self.shape_batch))
+            return Rectangle(x, y, width=10, height=10, color=arcade.color.WHITE, batch=self.shape_batch)
             
         elif shape_type == "triangle":
-            self.shapes.append(Triangle(x, y, x + 10, y, x + 5, y + 10, color=arcade.color.WHITE, batch=self.shape_batch))
+            return Triangle(x, y, x + 10, y, x + 5, y + 10, color=arcade.color.WHITE, batch=self.shape_batch)
         
-        else:
-            self.shapes.append(TexturedRectangle(pyglet.image.load(self.sprite_types[shape_type]), x, y, batch=self.shape_batch, shape_type=shape_type))
-    
-        shape = self.shapes[-1]
-        self.triggered_events.append(["spawn", {"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color}])
+        return TexturedRectangle(texture_cache.pyglet_image(self.sprite_types[shape_type]), x, y, batch=self.shape_batch, shape_type=shape_type)
+
+    def release_shape(self, shape):
+        self.shape_pool.release(shape)
 
     def add_sprite(self):
         self.disable_previous()
@@ -186,114 +134,42 @@ class Game(arcade.gui.UIView):
 
         def check_selection(delta_time):
             if self.sprite_add_filemanager.submitted_content:
-                texture = arcade.load_texture(self.sprite_add_filemanager.submitted_content)
-
-                SPRITE_TEXTURES[self.sprite_name_input.text] = texture
+                texture_cache.texture(self.sprite_add_filemanager.submitted_content, reload=True)
                 SPRITES[self.sprite_name_input.text] = self.sprite_add_filemanager.submitted_content
 
-                self.sprites_grid.clear()
-
-                for n, shape in enumerate(SPRITES):
-                    row, col = n % 8, n // 8
-                    box = self.sprites_grid.add(arcade.gui.UIBoxLayout(), row=row, column=col)
-                    box.add(arcade.gui.UILabel(text=shape, font_size=16, text_color=arcade.color.WHITE))
-                    box.add(arcade.gui.UIImage(texture=SPRITE_TEXTURES[shape], width=self.window.width / 15, height=self.window.width / 15))
+                self.refresh_sprites_grid()
 
                 self.anchor.remove(self.sprite_add_ui)
                 arcade.unschedule(check_selection)
 
         arcade.schedule(check_selection, 0.1)
 
-    def on_show_view(self):
-        super().on_show_view()
-
-        self.sprites_ui.add(arcade.gui.UILabel(text="Sprites", font_size=24, text_color=arcade.color.WHITE), anchor_x="center", anchor_y="top")
-
-        self.sprites_grid = self.sprites_ui.add(arcade.gui.UIGridLayout(columns=8, row_count=8, align="left", vertical_spacing=10, horizontal_spacing=10, size_hint=(0.95, 0.85), width=self.window.width * 0.95, height=self.window.height * 0.85), anchor_x="center", anchor_y="center")
+    def refresh_sprites_grid(self):
+        self.sprites_grid.clear()
 
         for n, shape in enumerate(SPRITES):
             row, col = n % 8, n // 8
             box = self.sprites_grid.add(arcade.gui.UIBoxLayout(), row=row, column=col)
             box.add(arcade.gui.UILabel(text=shape, font_size=16, text_color=arcade.color.WHITE))
-            box.add(arcade.gui.UIImage(texture=SPRITE_TEXTURES[shape], width=self.window.width / 15, height=self.window.width / 15))
+            box.add(arcade.gui.UIImage(texture=texture_cache.texture(SPRITES[shape]), width=self.window.width / 15, height=self.window.width / 15))
 
-        add_sprite_button = self.sprites_ui.add(arcade.gui.UITextureButton(text="Add Sprite", width=self.window.width / 2, height=self.window.height / 10, texture=button_texture, texture_hovered=button_hovered_texture, style=button_style), anchor_x="center", anchor_y="bottom", align_y=10)
-        add_sprite_button.on_click = lambda event: self.add_sprite()
+    def on_show_view(self):
+        super().on_show_view()
 
-        self.triggered_events.append(["start", {}])
+        self.sprites_ui.add(arcade.gui.UILabel(text="Sprites", font_size=24, text_color=arcade.color.WHITE), anchor_x="center", anchor_y="top")
 
-    def get_vars(self, rule_dict, vars, event_args):
-        args = [vars[n].value for n in range(len(rule_dict["user_vars"]))]
+        self.sprites_grid = self.sprites_ui.add(arcade.gui.UIGridLayout(columns=8, row_count=8, align="left", vertical_spacing=10, horizontal_spacing=10, size_hint=(0.95, 0.85), width=self.window.width * 0.95, height=self.window.height * 0.85), anchor_x="center", anchor_y="center")
 
-        return args + [event_args[var] for var in rule_dict.get("vars", []) if not var in rule_dict["user_vars"]]
+        self.refresh_sprites_grid()
 
-    def check_rule(self, rule_dict, vars, event_args):
-        return rule_dict["func"](*self.get_vars(rule_dict, vars, event_args))
-    
-    def get_action_function(self, action_dict):
-        ACTION_FUNCTION_DICT = {
-            "global_action": {
-                "spawn": self.spawn,
-                "change_x_gravity": self.change_x_gravity,
-                "change_y_gravity": self.change_y_gravity
-            },
-            "shape_action": {
-                "move_x": self.move_x,
-                "move_y": self.move_y,
-                "change_x": self.change_x,
-                "change_y": self.change_y,
-                "change_x_velocity": self.change_x_velocity,
-                "change_y_velocity": self.change_y_velocity,
-                "change_color": self.change_color,
-                "change_size": self.change_size,
-                "destroy": self.destroy
-            }
-        }
-
-        return ACTION_FUNCTION_DICT[action_dict["type"]][action_dict["name"]]
-
-    def run_do_rule(self, rule_dict, vars, event_args):
-        self.get_action_function(rule_dict["action"])(*self.get_vars(rule_dict, vars, event_args))
-
-    def recursive_execute_rule(self, rule, trigger_args):
-        for child_rule in rule.children:
-            child_rule_type = child_rule.rule_type
-
-            if child_rule_type == "for": # TODO: Extend this when i add more FOR loop types
-                if child_rule.rule == "every_shape":
-                    for shape in self.shapes:
-                        event_args = trigger_args.copy()
-                        event_args.update({"event_shape_type": shape.shape_type, "shape_size": shape.shape_size, "shape_x": shape.x, "shape_y": shape.y, "shape": shape, "shape_color": shape.shape_color})
-                        
-                        self.recursive_execute_rule(child_rule, event_args)
-                
-            elif child_rule_type == "if":
-                if self.check_rule(IF_RULES[child_rule.rule], child_rule.vars, trigger_args):
-                    self.recursive_execute_rule(child_rule, trigger_args)
+        add_sprite_button = self.sprites_ui.add(arcade.gui.UITextureButton(text="Add Sprite", width=self.window.width / 2, height=self.window.height / 10, texture=button_texture, texture_hovered=button_hovered_texture, style=button_style), anchor_x="center", anchor_y="bottom", align_y=10)
+        add_sprite_button.on_click = lambda event: self.add_sprite()
 
-            elif child_rule_type == "do":
-                self.run_do_rule(DO_RULES[child_rule.rule], child_rule.vars, trigger_args)
+        self.triggered_events.append(["start", EMPTY_EVENT])
 
     def get_max_rule_num(self):
-        max_num = -1
-        
-        def recurse(block: Block):
-            nonlocal max_num
-            max_num = max(max_num, block.rule_num)
-            for child in block.children:
-                recurse(child)
-        
-        for block in self.rulesets.values():
-            recurse(block)
-        
-        return max_num
+        return self.rules_box.block_renderer.index.max_rule_num
     
-    def dict_to_block(self, block_dict):
-        kwargs = block_dict.copy()
-        kwargs["children"] = [self.dict_to_block(child) for child in block_dict.get("children", [])]
-        kwargs["vars"] = [VarBlock(**var) for var in block_dict.get("vars", [])]
-        return Block(**kwargs)
-
     def on_update(self, delta_time):
         if self.mode == "import" and self.import_file_manager.submitted_content:
             with open(self.import_file_manager.submitted_content, "r") as file:
@@ -301,36 +177,29 @@ class Game(arcade.gui.UIView):
 
             self.import_file_manager.submitted_content = None
 
-            self.triggered_events = []
+            self.event_dispatcher.clear()
             self.rulesets = {}
 
             if not data:
                 self.add_widget(arcade.gui.UIMessageBox(message_text="Invalid file. Could not import rules.", width=self.window.width * 0.5, height=self.window.height * 0.25))
                 return
             
-            for rule_num, ruleset in data["rules"].items():
-                block = self.dict_to_block(ruleset)
-                self.rulesets[int(rule_num)] = block
+            self.rulesets = load_rulesets(data)
 
             self.sprite_types = data["sprites"]
+            self.shape_pool.clear() # pooled sprites could use a texture that the imported sprite types replaced
             for sprite_name, sprite_path in self.sprite_types.items():
-                if not sprite_name in SPRITE_TEXTURES:
-                    SPRITE_TEXTURES[sprite_name] = arcade.load_texture(sprite_path)
-
+                texture_cache.texture(sprite_path, reload=True)
                 SPRITES[sprite_name] = sprite_path
             
-            self.sprites_grid.clear()
-
-            for n, shape in enumerate(SPRITES):
-                row, col = n % 8, n // 8
-                box = self.sprites_grid.add(arcade.gui.UIBoxLayout(), row=row, column=col)
-                box.add(arcade.gui.UILabel(text=shape, font_size=16, text_color=arcade.color.WHITE))
-                box.add(arcade.gui.UIImage(texture=SPRITE_TEXTURES[shape], width=self.window.width / 15, height=self.window.width / 15))
+            self.refresh_sprites_grid()
 
             self.rules_box.rulesets = self.rulesets
             self.rules_box.block_renderer.blocks = self.rulesets 
-            self.rules_box.current_rule_num = self.get_max_rule_num() + 1
             self.rules_box.block_renderer.refresh()
+            self.rules_box.current_rule_num = self.get_max_rule_num() + 1
+
+            self.load_rules(self.rulesets)
 
             self.rules()
 
@@ -353,67 +222,36 @@ class Game(arcade.gui.UIView):
         if not self.mode == "simulation":
             return
 
-        self.triggered_events.append(["every_update", {}])
-
-        while len(self.triggered_events) > 0:
-            trigger, trigger_args = self.triggered_events.pop(0)
+        for _ in range(self.timestep.advance(delta_time)):
+            self.tick()
 
-            for rule_num, rule in self.rulesets.items():
-                if not rule.rule_type == "trigger" or not trigger == rule.rule:
-                    continue
-                
-                self.recursive_execute_rule(rule, trigger_args)
-
-        has_collision_rules = any(
-            rule.rule_type == "trigger" and rule.rule == "collision" 
-            for rule in self.rulesets.values()
-        )
-
-        for shape in self.shapes:
-            shape.update(self.x_gravity, self.y_gravity)
-
-        if has_collision_rules:
-            for i, shape in enumerate(self.shapes):
-                for shape_b in self.shapes[i+1:]:
-                    if shape.check_collision(shape_b):
-                        self.triggered_events.append(["collision", {
-                            "event_a_type": shape.shape_type, 
-                            "event_b_type": shape_b.shape_type, 
-                            "shape_size": shape.shape_size, 
-                            "shape_x": shape.x, 
-                            "shape_y": shape.y, 
-                            "shape": shape, 
-                            "shape_color": shape.shape_color
-                        }])
-
-        for shape in self.shapes[:]:
-            if shape.x < 0 or shape.x > self.window.width or shape.y < 0 or shape.y > self.window.height:
-                self.destroy(shape)
-
-        if len(self.shapes) > self.settings.get("max_shapes", 120):
-            for shape in self.shapes[:-self.settings.get("max_shapes", 120)]:
-                self.destroy(shape)
+        self.shape_store.sync(self.timestep.alpha)
 
     def on_key_press(self, symbol, modifiers):
         if symbol == arcade.key.ESCAPE:
             self.main_exit()
+        elif symbol == arcade.key.F3:
+            self.toggle_profiler_overlay()
+        elif self.mode == "simulation" and symbol in (arcade.key.MINUS, arcade.key.EQUAL):
+            self.timestep.change_speed(-1 if symbol == arcade.key.MINUS else 1)
+            self.speed_text.text = "" if self.timestep.speed == 1.0 else f"Speed: {self.timestep.speed:g}x"
         elif self.mode == "simulation" and symbol in [ord(key) if len(key) == 1 else getattr(arcade.key, key.upper()) for key in ALLOWED_INPUT]:
-            self.triggered_events.append(["on_input", {"event_key": chr(symbol)}])
+            self.triggered_events.append(["on_input", KeyEvent(chr(symbol))])
 
     def on_mouse_press(self, x, y, button, modifiers):
         if not self.mode == "simulation":
             return
         
         if button == arcade.MOUSE_BUTTON_LEFT:
-            self.triggered_events.append(["on_left_click", {}])
+            self.triggered_events.append(["on_left_click", EMPTY_EVENT])
         elif self.mode == "simulation" and button == arcade.MOUSE_BUTTON_RIGHT:
-            self.triggered_events.append(["on_right_click", {}])
+            self.triggered_events.append(["on_right_click", EMPTY_EVENT])
 
     def on_mouse_motion(self, x, y, button, modifiers):
         if not self.mode == "simulation":
             return
 
-        self.triggered_events.append(["on_mouse_move", {}])
+        self.triggered_events.append(["on_mouse_move", EMPTY_EVENT])
 
     def on_mouse_drag(self, x, y, dx, dy, _buttons, _modifiers):
         if self.mode == "rules" and arcade.MOUSE_BUTTON_MIDDLE == _buttons:
@@ -430,6 +268,7 @@ class Game(arcade.gui.UIView):
             self.anchor.remove(self.export_file_manager)
         elif self.mode == "rules":
             self.anchor.remove(self.rules_box)
+            self.load_rules(self.rules_box.rulesets)
         elif self.mode == "sprites":
             self.anchor.remove(self.sprites_ui)
         elif self.mode == "sprite_add":
@@ -465,13 +304,19 @@ class Game(arcade.gui.UIView):
 
     def simulation(self):
         self.disable_previous()
-        self.x_gravity = self.settings.get("default_x_gravity", 0)
-        self.y_gravity = self.settings.get("default_y_gravity", 5)
-        self.triggered_events = []
+        self.reset_world()
+        self.timestep.reset()
         self.rulesets = self.rules_box.rulesets
         self.mode = "simulation"
 
+    def close_profiler(self):
+        self.profiler.close() # returns None so the window still closes
+
     def main_exit(self):
+        if self.profiler.export_file is not None:
+            self.window.remove_handlers(on_close=self.close_profiler)
+        self.profiler.close()
+
         from menus.main import Main
         self.window.show_view(Main(self.pypresence_client))
 
@@ -479,11 +324,31 @@ class Game(arcade.gui.UIView):
         self.window.clear()
         
         if self.mode == "simulation":
-            self.shape_batch.draw()
+            if self.phase_timer is not None:
+                start = perf_counter()
+                self.shape_batch.draw()
+                self.profiler.record_draw(perf_counter() - start)
+            else:
+                self.shape_batch.draw()
         elif self.mode == "rules":
             with self.rules_box.camera.activate():
                 self.rules_box.draw()
                 
             self.rules_box.draw_unproject()
    
-        self.ui.draw()
\ No newline at end of file
+        self.ui.draw()
+
+        if self.mode == "simulation" and self.speed_text.text:
+            self.speed_text.draw()
+
+        if self.profiler_overlay and self.mode == "simulation":
+            self.draw_profiler_overlay()
+
+    def draw_profiler_overlay(self):
+        if self.profiler.ticks - self.profiler_text_tick >= 10:
+            self.profiler_text.text = self.profiler.overlay_text(len(self.shapes))
+            self.profiler_text_tick = self.profiler.ticks
+
+        text = self.profiler_text
+        arcade.draw_lrbt_rectangle_filled(0, text.content_width + 20, self.window.height - text.content_height - 20, self.window.height, (0, 0, 0, 180))
+        text.draw()
\ No newline at end of file
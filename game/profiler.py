@@ -0,0 +1,75 @@
+import csv, json
+import numpy as np
+
+from collections import deque
+
+from game.phase_timer import PhaseTimer, PHASES
+
+FRAME_PHASES = PHASES + ("draw",)
+
+class FrameProfiler(PhaseTimer):
+    def __init__(self, window=300):
+        super().__init__()
+
+        self.history = {phase: deque(maxlen=window) for phase in FRAME_PHASES}
+        self.last_draw = 0.0
+
+        self.export_file = None
+        self.csv_writer = None
+
+    def start_export(self, path, export_format):
+        self.export_file = open(path, "w", newline="")
+
+        if export_format == "CSV":
+            self.csv_writer = csv.writer(self.export_file)
+            self.csv_writer.writerow(["tick", *(f"{phase}_ms" for phase in FRAME_PHASES), "rules_evaluated", "deferred", "skipped_loops", "events"])
+
+    def close(self):
+        if self.export_file is not None:
+            self.export_file.close()
+            self.export_file, self.csv_writer = None, None
+
+    def end(self):
+        super().end()
+
+        for phase in PHASES:
+            self.history[phase].append(self.last[phase])
+
+        if self.export_file is not None:
+            self.export_row()
+
+    def record_draw(self, seconds):
+        self.last_draw = seconds
+        self.history["draw"].append(seconds)
+
+    def export_row(self):
+        timings = {phase: round(self.last[phase] * 1000, 4) for phase in PHASES}
+        timings["draw"] = round(self.last_draw * 1000, 4)
+
+        if self.csv_writer is not None:
+            events = ";".join(f"{trigger}:{count}" for trigger, count in sorted(self.event_counts.items()))
+            self.csv_writer.writerow([self.ticks, *(timings[phase] for phase in FRAME_PHASES), self.rules_evaluated, self.deferred, self.skipped_loops, events])
+        else:
+            self.export_file.write(json.dumps({"tick": self.ticks, "phases_ms": timings, "rules_evaluated": self.rules_evaluated, "deferred": self.deferred, "skipped_loops": self.skipped_loops, "events": self.event_counts}) + "\n")
+
+    def percentiles(self, phase, percents=(50, 95, 99)):
+        history = self.history[phase]
+        if not history:
+            return (0.0,) * len(percents)
+
+        return tuple(np.percentile(np.fromiter(history, dtype=float), percents) * 1000)
+
+    def overlay_text(self, shape_count):
+        lines = [f"{'phase':<16}{'last':>8}{'p50':>8}{'p95':>8}{'p99':>8}  (ms)"]
+
+        for phase in FRAME_PHASES:
+            last = self.last_draw if phase == "draw" else self.last[phase]
+            lines.append(f"{phase:<16}{last * 1000:>8.2f}" + "".join(f"{value:>8.2f}" for value in self.percentiles(phase)))
+
+        lines.append("")
+        lines.append(f"shapes: {shape_count}    rules evaluated: {self.rules_evaluated}")
+        if self.overflow_ticks:
+            lines.append(f"deferred: {self.deferred}    skipped loops: {self.skipped_loops}    over budget: {self.overflow_ticks} ticks")
+        lines.extend(f"{trigger}: {count}" for trigger, count in sorted(self.event_counts.items()))
+
+        return "\n".join(lines)
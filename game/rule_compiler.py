@@ -0,0 +1,185 @@
+import numpy as np
+
+from operator import attrgetter
+
+from utils.constants import IF_RULES, DO_RULES, TRIGGER_RULES, OPS
+from game.events import ShapeContext
+from game.bulk_rules import compile_bulk_for
+
+# Turns the Block trees from game/rules.py into nested closures once, so executing a rule doesn't need
+# any rule dict lookups or argument list rebuilding.
+
+def bind_rule(rule_dict, vars, func):
+    user_values = tuple(vars[n].value for n in range(len(rule_dict["user_vars"])))
+    event_keys = tuple(var for var in rule_dict.get("vars", []) if not var in rule_dict["user_vars"])
+
+    if not event_keys:
+        return lambda event_args: func(*user_values)
+
+    get_event_values = attrgetter(*event_keys)
+
+    if len(event_keys) == 1:
+        return lambda event_args: func(*user_values, get_event_values(event_args))
+    else:
+        return lambda event_args: func(*user_values, *get_event_values(event_args))
+
+def compile_children(children, simulation):
+    compiled = [compile_block(child, simulation) for child in children]
+
+    if not compiled:
+        return lambda event_args: None
+    elif len(compiled) == 1:
+        return compiled[0]
+
+    def run_children(event_args):
+        for child in compiled:
+            child(event_args)
+
+    return run_children
+
+def compile_if(block, simulation):
+    check = bind_rule(IF_RULES[block.rule], block.vars, IF_RULES[block.rule]["func"])
+    body = compile_children(block.children, simulation)
+
+    def run_if(event_args):
+        if check(event_args):
+            body(event_args)
+
+    return run_if
+
+def compile_do(block, simulation):
+    rule_dict = DO_RULES[block.rule]
+    action = bind_rule(rule_dict, block.vars, getattr(simulation, rule_dict["action"]["name"]))
+
+    if not "shape" in rule_dict["vars"]:
+        return action
+
+    def run_shape_action(event_args):
+        shape = event_args.shape
+        # No shape when the rule sits under a trigger without one, and an earlier action in the same rule may have
+        # destroyed it
+        if shape is not None and shape.alive:
+            action(event_args)
+
+    return run_shape_action
+
+SELECTABLE_IF_RULES = ("shape_type_is", "color_is", "x_position_compare", "y_position_compare")
+
+def leading_filters(block):
+    # The IFs every shape has to pass before anything else in the loop runs, i.e. a chain of single children
+    filters = []
+    children = block.children
+
+    while len(children) == 1 and children[0].rule_type == "if" and children[0].rule in SELECTABLE_IF_RULES:
+        filters.append((children[0].rule, [var.value for var in children[0].vars]))
+        children = children[0].children
+
+    return filters
+
+def compile_shape_selection(filters, simulation):
+    # Picks the shapes a filtered FOR loop can match without visiting the others: the smallest type or color
+    # bucket, otherwise the shapes inside the position ranges. The IFs still run on every selected shape.
+    store = simulation.shape_store
+
+    buckets = [(store.shapes_by_type if rule == "shape_type_is" else store.shapes_by_color, values[0]) for rule, values in filters if rule in ("shape_type_is", "color_is")]
+    ranges = [
+        ("x" if rule == "x_position_compare" else "y", OPS[values[0]], values[1])
+        for rule, values in filters
+        if rule in ("x_position_compare", "y_position_compare") and values[0] in OPS and isinstance(values[1], (int, float))
+    ]
+
+    if buckets:
+        def select_from_bucket():
+            return list(min((index.get(value, {}) for index, value in buckets), key=len))
+
+        return select_from_bucket
+
+    if ranges:
+        def select_in_range():
+            n = store.count
+            inside = np.ones(n, dtype=bool)
+            for axis, op, value in ranges:
+                inside &= op(getattr(store, axis)[:n], value)
+
+            shapes = store.shapes
+            return [shapes[index] for index in np.flatnonzero(inside).tolist()]
+
+        return select_in_range
+
+    return None
+
+def compile_for(block, simulation):
+    body = compile_children(block.children, simulation)
+
+    if block.rule == "every_shape": # TODO: Extend this when i add more FOR loop types
+        run_bulk = compile_bulk_for(block, simulation)
+        if run_bulk is not None:
+            return run_bulk
+
+        select = compile_shape_selection(leading_filters(block), simulation)
+
+        if select is not None:
+            def run_selected_shapes(trigger_args):
+                event_args = ShapeContext(trigger_args)
+                shapes = [(shape, shape.serial) for shape in select()]
+                if not simulation.event_dispatcher.count_rules(len(shapes)):
+                    return
+
+                for shape, serial in shapes:
+                    if shape.serial == serial: # an earlier shape's rules may have destroyed it, or the pool reused it
+                        event_args.shape = shape
+                        body(event_args)
+
+            return run_selected_shapes
+
+        def run_every_shape(trigger_args):
+            event_args = ShapeContext(trigger_args)
+            shapes = [(shape, shape.serial) for shape in simulation.shapes]
+            if not simulation.event_dispatcher.count_rules(len(shapes)):
+                return
+
+            # The shapes when the loop starts, like the selected loop above, so shapes spawned or swapped into
+            # a destroyed shape's slot by the body don't change which shapes it visits
+            for shape, serial in shapes:
+                if shape.serial == serial:
+                    event_args.shape = shape
+                    body(event_args)
+
+        return run_every_shape
+
+    return lambda event_args: None
+
+def compile_block(block, simulation):
+    if block.rule_type == "if":
+        return compile_if(block, simulation)
+    elif block.rule_type == "do":
+        return compile_do(block, simulation)
+    elif block.rule_type == "for":
+        return compile_for(block, simulation)
+
+    return lambda event_args: None
+
+def compile_trigger(block, simulation):
+    condition = bind_rule(TRIGGER_RULES[block.rule], block.vars, TRIGGER_RULES[block.rule]["func"])
+    body = compile_children(block.children, simulation)
+
+    def run_trigger(event_args):
+        if condition(event_args):
+            body(event_args)
+
+    return run_trigger
+
+def trigger_shape_type(block):
+    user_vars = TRIGGER_RULES[block.rule]["user_vars"]
+
+    if "shape_type" in user_vars:
+        return block.vars[user_vars.index("shape_type")].value
+
+    return None
+
+def compile_rules(rulesets, simulation):
+    return [
+        (block.rule, trigger_shape_type(block), compile_trigger(block, simulation))
+        for block in rulesets.values()
+        if block.rule_type == "trigger"
+    ]
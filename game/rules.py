@@ -1,8 +1,4 @@
 from utils.constants import (
-    DO_RULES,
-    IF_RULES,
-    TRIGGER_RULES,
-    FOR_RULES,
     NEEDS_SHAPE,
     PROVIDES_SHAPE,
     button_style,
@@ -17,86 +13,218 @@ from utils.constants import (
 )
 from typing import List
 from utils.preload import button_texture, button_hovered_texture, trash_bin
+from game.blocks import VarBlock, Block, BlockIndex, get_rule_dict
+from game.label_pool import LabelPool
+from game.spatial_hash import SpatialGrid
 from arcade.gui.experimental.scroll_area import UIScrollArea, UIScrollBar
-from dataclasses import dataclass, field
 import arcade, arcade.gui, pyglet, random, re
 
-def get_rule_dict(rule_type):
-    if rule_type == "if":
-        return IF_RULES
-    elif rule_type == "for":
-        return FOR_RULES
-    elif rule_type == "trigger":
-        return TRIGGER_RULES
-    elif rule_type == "do":
-        return DO_RULES
-    
-@dataclass
-class VarBlock:
-    x: float
-    y: float
-    label: str
-    var_type: str
-    connected_rule_num: str
-    value: str | int
-
-@dataclass
-class Block:
-    x: float
-    y: float
-    label: str
-    rule_type: str
-    rule: str
-    rule_num: int
-    vars: List["VarBlock"] = field(default_factory=list)
-    children: List["Block"] = field(default_factory=list)
+class TranslationGroup(pyglet.graphics.Group):
+    # Shifts everything drawn under it by offset through the view matrix, so moving it doesn't rewrite any vertices
+    def __init__(self, order=0, parent=None):
+        super().__init__(order, parent)
+        self.offset = (0, 0)
+        self.previous_view = None
+
+    def set_state(self):
+        window = arcade.get_window()
+        self.previous_view = window.view
+        window.view = window.view @ pyglet.math.Mat4.from_translation(pyglet.math.Vec3(self.offset[0], self.offset[1], 0))
+
+    def unset_state(self):
+        arcade.get_window().view = self.previous_view
 
 class BlockRenderer:
     def __init__(self, blocks: List[Block], indent: int = 12):
         self.blocks = blocks
+        self.index = BlockIndex(blocks)
         self.indent = indent
+        # Labels share the shapes' batch in a group drawn after the shapes, so the whole canvas is a few draw calls
         self.shapes = pyglet.graphics.Batch()
+        self.shape_group = pyglet.graphics.Group(order=0)
+        self.text_group = pyglet.graphics.Group(order=1)
+        self.labels = LabelPool(self.shapes, self.text_group)
+        # The dragged subtree is drawn above everything else and a drag only changes this group's offset
+        self.drag_group = TranslationGroup(order=2)
+        self.drag_shape_group = pyglet.graphics.Group(order=0, parent=self.drag_group)
+        self.drag_text_group = pyglet.graphics.Group(order=1, parent=self.drag_group)
+        self.dragged_block = None
         self.shapes_by_rule_num = {}
-        self.text_objects = []
+        self.wrap_shapes_by_rule_num = {}
         self.text_by_rule_num = {}
-        self.var_widgets = {}  
+        self.var_widgets = {}
+        self.heights = {}
+        # Header rects of every laid out block and the rects of the built var widgets, for hit testing
+        self.block_grid = SpatialGrid(256)
+        self.var_grid = SpatialGrid(256)
+        self.var_widgets_built = 0
+        # Only blocks inside built_area get shapes and labels, the rest are built when the camera gets near them.
+        # None means the whole canvas is built.
+        self.built_area = None
+        self.view_margin = 0.5
         self.refresh()
 
     def refresh(self):
-        for shapes_list in self.shapes_by_rule_num.values():
-            for shape in shapes_list:
-                shape.delete()
-        
-        for text_list in self.text_by_rule_num.values():
-            for text in text_list:
-                text.delete()
+        for rule_num in list(self.shapes_by_rule_num):
+            self._delete_elements(rule_num)
 
-        self.shapes = pyglet.graphics.Batch()
         self.shapes_by_rule_num = {}
-        self.text_objects = []
+        self.wrap_shapes_by_rule_num = {}
         self.text_by_rule_num = {}
         self.var_widgets = {}
+        self.heights = {}
+        self.block_grid.clear()
+        self.var_grid.clear()
+        self.index.rebuild(self.blocks)
         for b in self.blocks.values():
             self._build_block(b, b.x, b.y)
 
+    def _delete_elements(self, rule_num, keep_wrap=False):
+        for shape in self.shapes_by_rule_num.pop(rule_num, []):
+            shape.delete()
+
+        for text in self.text_by_rule_num.pop(rule_num, []):
+            self.labels.release(text)
+
+        for index in range(len(self.var_widgets.pop(rule_num, []))):
+            self.var_grid.remove((rule_num, index))
+
+        if not keep_wrap:
+            for shape in self.wrap_shapes_by_rule_num.pop(rule_num, []):
+                shape.delete()
+
+    def _delete_subtree(self, block: Block):
+        self._delete_elements(block.rule_num)
+        self.heights.pop(block.rule_num, None)
+        self.block_grid.remove(block.rule_num)
+
+        for child in block.children:
+            self._delete_subtree(child)
+
+    def add_block(self, block: Block):
+        self.index.add(block)
+        self._build_block(block, block.x, block.y)
+
+    def remove_block(self, block: Block):
+        self._delete_subtree(block)
+        self.index.remove(block)
+
+    def rebuild_block(self, block: Block):
+        # Rebuilds one subtree in place, then moves whatever is below it if its height changed
+        old_height = self.heights.get(block.rule_num, 0)
+
+        self._delete_subtree(block)
+        self._build_block(block, block.x, block.y)
+
+        self._reflow(block, self.heights[block.rule_num] - old_height)
+
+    def rebuild_header(self, block: Block):
+        # Variable edits only change the block's own row, never its height
+        self._delete_elements(block.rule_num, keep_wrap=True)
+        self._sync_elements(block)
+
+    def _reflow(self, block: Block, height_change):
+        parent = self._find_parent(block.rule_num)
+
+        while height_change and parent is not None:
+            siblings = parent.children
+            for sibling in siblings[siblings.index(block) + 1:]:
+                self.move_block(0, -height_change, sibling.rule_num)
+
+            self.heights[parent.rule_num] += height_change
+            for shape in self.wrap_shapes_by_rule_num.pop(parent.rule_num, []):
+                shape.delete()
+            self._sync_elements(parent)
+
+            block, parent = parent, self._find_parent(parent.rule_num)
+
+    def set_viewport(self, left, bottom, right, top):
+        area = self.built_area
+        if area is not None and area[0] <= left and area[1] <= bottom and right <= area[2] and top <= area[3]:
+            # Still inside the built area, unless the camera zoomed in far enough that most of it is off-screen
+            if (right - left) * 3 > area[2] - area[0]:
+                return
+
+        margin_x, margin_y = (right - left) * self.view_margin, (top - bottom) * self.view_margin
+        self.built_area = (left - margin_x, bottom - margin_y, right + margin_x, top + margin_y)
+
+        for b in self.blocks.values():
+            if b is not self.dragged_block: # its elements are still at the position the drag started from
+                self._sync_subtree(b)
+
+    def _in_view(self, left, bottom, right, top):
+        area = self.built_area
+        return area is None or (left < area[2] and right > area[0] and bottom < area[3] and top > area[1])
+
+    def _sync_elements(self, b: Block):
+        # Builds the header and wrap of a block that came into view and drops them once it's out of view
+        header_in_view = self._in_view(b.x, b.y - 42, b.x + 380, b.y)
+        if header_in_view and b.rule_num not in self.shapes_by_rule_num:
+            self._build_header(b, b.x, b.y)
+        elif not header_in_view and b.rule_num in self.shapes_by_rule_num:
+            self._delete_elements(b.rule_num, keep_wrap=True)
+
+        if b.rule_type == "do":
+            return
+
+        bottom = b.y - self.heights[b.rule_num]
+        wrap_in_view = self._in_view(b.x, bottom, b.x + 380, b.y - 42)
+        if wrap_in_view and b.rule_num not in self.wrap_shapes_by_rule_num:
+            self._build_wrap(b, b.x, b.y - 42, bottom + 24)
+        elif not wrap_in_view:
+            for shape in self.wrap_shapes_by_rule_num.pop(b.rule_num, []):
+                shape.delete()
+
+    def _sync_subtree(self, b: Block):
+        self._sync_elements(b)
+
+        for child in b.children:
+            self._sync_subtree(child)
+
+    def _set_subtree_groups(self, block: Block, shape_group, text_group):
+        for shape in self.shapes_by_rule_num.get(block.rule_num, []) + self.wrap_shapes_by_rule_num.get(block.rule_num, []):
+            shape.group = shape_group
+
+        for text in self.text_by_rule_num.get(block.rule_num, []):
+            text.group = text_group
+
+        for child in block.children:
+            self._set_subtree_groups(child, shape_group, text_group)
+
+    def begin_drag(self, block: Block):
+        self.dragged_block = block
+        self.drag_group.offset = (0, 0)
+        self._set_subtree_groups(block, self.drag_shape_group, self.drag_text_group)
+
+    def drag_by(self, dx, dy):
+        x, y = self.drag_group.offset
+        self.drag_group.offset = (x + dx, y + dy)
+
+    def drag_position(self):
+        # Where the dragged block is drawn, its own x and y only catch up with the offset in end_drag
+        x, y = self.drag_group.offset
+        return self.dragged_block.x + x, self.dragged_block.y + y
+
+    def end_drag(self):
+        # Applies the offset to the blocks and their elements, then puts the elements back into the shared groups
+        block, self.dragged_block = self.dragged_block, None
+        if block is None:
+            return
+
+        self._set_subtree_groups(block, self.shape_group, self.text_group)
+        self.move_block(*self.drag_group.offset, block.rule_num)
+        self.drag_group.offset = (0, 0)
+
     def _build_var_ui(self, var: VarBlock, x: int, y: int, rule_num: int) -> tuple:
         var_width = max(60, len(str(var.value)) * 8 + 20)
         var_height = 24
         var_color = (255, 255, 255) 
         var_rect = pyglet.shapes.BorderedRectangle(
             x, y - var_height // 2, var_width, var_height, 
-            2, var_color, arcade.color.BLACK, batch=self.shapes
+            2, var_color, arcade.color.BLACK, batch=self.shapes, group=self.shape_group
         )
         
-        var_text = pyglet.text.Label(
-            text=str(var.value), 
-            x=x + var_width // 2, 
-            y=y, 
-            color=arcade.color.BLACK, 
-            font_size=10,
-            anchor_x='center',
-            anchor_y='center'
-        )
+        var_text = self.labels.acquire(str(var.value), x + var_width // 2, y, 10, anchor_x='center', anchor_y='center')
         
         if rule_num not in self.shapes_by_rule_num:
             self.shapes_by_rule_num[rule_num] = []
@@ -104,20 +232,24 @@ class BlockRenderer:
             self.text_by_rule_num[rule_num] = []
         if rule_num not in self.var_widgets:
             self.var_widgets[rule_num] = []
+            self.var_widgets_built += 1
             
         self.shapes_by_rule_num[rule_num].append(var_rect)
         self.text_by_rule_num[rule_num].append(var_text)
-        self.text_objects.append(var_text)
         
-        self.var_widgets[rule_num].append({
+        widget = {
             'var': var,
             'rect': var_rect,
             'text': var_text,
             'x': x,
             'y': y,
             'width': var_width,
-            'height': var_height
-        })
+            'height': var_height,
+            # Overlapping widgets are resolved in the order their blocks were built, like a walk over var_widgets
+            'order': self.var_widgets_built
+        }
+        self.var_grid.insert((rule_num, len(self.var_widgets[rule_num])), (x, y - var_height // 2, x + var_width, y + var_height // 2), widget)
+        self.var_widgets[rule_num].append(widget)
         
         return var_width, var_height
 
@@ -134,15 +266,7 @@ class BlockRenderer:
         for i, part in enumerate(parts):
             if i % 2 == 0:
                 if part:
-                    text_obj = pyglet.text.Label(
-                        text=part, 
-                        x=current_x, 
-                        y=current_y - 3, 
-                        color=arcade.color.BLACK, 
-                        font_size=12, 
-                        weight="bold"
-                    )
-                    self.text_objects.append(text_obj)
+                    text_obj = self.labels.acquire(part, current_x, current_y - 3, 12, weight="bold")
                     self.text_by_rule_num[b.rule_num].append(text_obj)
                     
                     current_x += len(part) * 12
@@ -155,114 +279,104 @@ class BlockRenderer:
                     current_x += var_width + 10
                     var_index += 1
 
-    def _build_block(self, b: Block, x: int, y: int) -> int:
-        is_wrap = b.rule_type != "do"
-        h, w = 42, 380
-
+    def _block_color(self, b: Block):
         if b.rule_type == "if":
-            color = IF_COLOR
+            return IF_COLOR
         elif b.rule_type == "trigger":
-            color = TRIGGER_COLOR
+            return TRIGGER_COLOR
         elif b.rule_type == "do":
-            color = DO_COLOR
+            return DO_COLOR
         elif b.rule_type == "for":
-            color = FOR_COLOR
+            return FOR_COLOR
 
+    def _build_header(self, b: Block, x: int, y: int) -> None:
+        h, w = 42, 380
         lx, ly = x, y - h
-        
-        if b.rule_num not in self.shapes_by_rule_num:
-            self.shapes_by_rule_num[b.rule_num] = []
-        if b.rule_num not in self.text_by_rule_num:
-            self.text_by_rule_num[b.rule_num] = []
-        
-        rect = pyglet.shapes.BorderedRectangle(lx, ly, w, h, 2, color, arcade.color.BLACK, batch=self.shapes)
+
+        self.shapes_by_rule_num[b.rule_num] = []
+        self.text_by_rule_num[b.rule_num] = []
+
+        rect = pyglet.shapes.BorderedRectangle(lx, ly, w, h, 2, self._block_color(b), arcade.color.BLACK, batch=self.shapes, group=self.shape_group)
         self.shapes_by_rule_num[b.rule_num].append(rect)
         
         if b.vars:
             self._build_block_with_vars(b, x, y)
         else:
-            text_obj = pyglet.text.Label(
-                text=b.label, 
-                x=lx + 7, 
-                y=ly + 20, 
-                color=arcade.color.BLACK, 
-                font_size=12, 
-                weight="bold"
-            )
-            self.text_objects.append(text_obj)
+            text_obj = self.labels.acquire(b.label, lx + 7, ly + 20, 12, weight="bold")
             self.text_by_rule_num[b.rule_num].append(text_obj)
 
-        next_y = ly
-        if is_wrap:
-            iy = next_y
-            for child in b.children:
-                child.x = lx + self.indent + 5
-                child.y = iy
-                iy = self._build_block(child, lx + self.indent + 5, iy)
-            
-            bar_h = next_y - iy 
-            bar_filled = pyglet.shapes.Rectangle(lx + 2, iy + 2, self.indent, bar_h, color, batch=self.shapes)
-            line1 = pyglet.shapes.Line(lx, next_y, lx, iy, 2, arcade.color.BLACK, batch=self.shapes)
-            bottom = pyglet.shapes.BorderedRectangle(lx, iy - 8, w, 24, 2, color, arcade.color.BLACK, batch=self.shapes)
+    def _build_wrap(self, b: Block, lx: int, top: int, iy: int) -> None:
+        color, w = self._block_color(b), 380
 
-            self.shapes_by_rule_num[b.rule_num].extend([bar_filled, line1, bottom])
-            
-            return iy - 24
+        bar_filled = pyglet.shapes.Rectangle(lx + 2, iy + 2, self.indent, top - iy, color, batch=self.shapes, group=self.shape_group)
+        line1 = pyglet.shapes.Line(lx, top, lx, iy, 2, arcade.color.BLACK, batch=self.shapes, group=self.shape_group)
+        bottom = pyglet.shapes.BorderedRectangle(lx, iy - 8, w, 24, 2, color, arcade.color.BLACK, batch=self.shapes, group=self.shape_group)
+
+        self.wrap_shapes_by_rule_num[b.rule_num] = [bar_filled, line1, bottom]
+
+    def _build_block(self, b: Block, x: int, y: int) -> int:
+        is_wrap = b.rule_type != "do"
+        lx, ly = x, y - 42
+
+        if is_wrap:
+            child_x, spacing = lx + self.indent + 5, 24
         else:
-            for child in b.children:
-                child.x = lx
-                child.y = next_y
-                ly = self._build_block(child, lx, next_y)
-            return ly - 16
+            child_x, spacing = lx, 16
+
+        iy = ly
+        for child in b.children:
+            child.x = child_x
+            child.y = iy
+            iy = self._build_block(child, child_x, iy)
+
+        self.heights[b.rule_num] = y - (iy - spacing)
+        self.block_grid.insert(b.rule_num, (x, y - 44, x + 380, y), b)
+        self._sync_elements(b)
+
+        return iy - spacing
 
     def move_block(self, x, y, rule_num):
-        for element in self.shapes_by_rule_num[rule_num] + self.text_by_rule_num[rule_num]:
+        block = self._find_block(rule_num)
+        block.x += x
+        block.y += y
+
+        for element in self.shapes_by_rule_num.get(rule_num, []) + self.text_by_rule_num.get(rule_num, []) + self.wrap_shapes_by_rule_num.get(rule_num, []):
             element.x += x
             element.y += y
         
         if rule_num in self.var_widgets:
-            for widget in self.var_widgets[rule_num]:
+            for index, widget in enumerate(self.var_widgets[rule_num]):
                 widget['x'] += x
                 widget['y'] += y
+                self.var_grid.move((rule_num, index), x, y)
 
-        block = self._find_block(rule_num)
+        self.block_grid.move(rule_num, x, y)
+
+        self._sync_elements(block)
 
         for child in block.children:
             self.move_block(x, y, child.rule_num)
 
     def get_var_at_position(self, x, y):
-        for rule_num, widgets in self.var_widgets.items():
-            for widget in widgets:
-                wx, wy = widget['x'], widget['y']
-                ww, wh = widget['width'], widget['height']
-                if (wx <= x <= wx + ww and 
-                    wy - wh // 2 <= y <= wy + wh // 2):
-                    return widget['var'], rule_num
+        for (rule_num, _), widget in sorted(self.var_grid.query(x, y, x, y), key=lambda candidate: (candidate[1]['order'], candidate[0])):
+            wx, wy = widget['x'], widget['y']
+            ww, wh = widget['width'], widget['height']
+            if (wx <= x <= wx + ww and 
+                wy - wh // 2 <= y <= wy + wh // 2):
+                return widget['var'], rule_num
         return None, None
 
+    def blocks_in_area(self, left, bottom, right, top):
+        return [block for _, block in self.block_grid.query(left, bottom, right, top)]
+
     def _find_block(self, rule_num):
-        if rule_num in self.blocks:
-            return self.blocks[rule_num]
-        
-        for block in self.blocks.values():
-            found = self._find_block_recursive(block, rule_num)
-            if found:
-                return found
-        return None
+        return self.index.find(rule_num)
 
-    def _find_block_recursive(self, block, rule_num):
-        for child in block.children:
-            if child.rule_num == rule_num:
-                return child
-            found = self._find_block_recursive(child, rule_num)
-            if found:
-                return found
-        return None
+    def _find_parent(self, rule_num):
+        return self.index.parent_of(rule_num)
 
     def draw(self):
         self.shapes.draw()
-        for t in self.text_objects:
-            t.draw()
 
 class VarEditDialog(arcade.gui.UIAnchorLayout):
     def __init__(self, var: VarBlock, on_save, on_cancel):
@@ -299,7 +413,7 @@ class VarEditDialog(arcade.gui.UIAnchorLayout):
                 height=40
             )
             dialog_box.add(self.input_field)
-        elif var.var_type in ["shape_type", "target_type", "color", "key_input", "comparison"]:
+        elif var.var_type in ["shape_type", "target_type", "color", "key_input", "comparison", "contact"]:
             from utils.constants import VAR_OPTIONS
             options = VAR_OPTIONS[var.var_type]
             self.dropdown = arcade.gui.UIDropdown(
@@ -449,56 +563,99 @@ class RuleUI(arcade.gui.UIAnchorLayout):
 
         self.rulesets[self.current_rule_num] = rule_box
         self.current_rule_num += 1
-        self.block_renderer.refresh()
+        self.block_renderer.add_block(rule_box)
 
         return rule_box
 
     def draw(self):
+        viewport = self.camera.viewport
+        left, bottom, _ = self.camera.unproject((viewport.left, viewport.bottom))
+        right, top, _ = self.camera.unproject((viewport.right, viewport.top))
+        self.block_renderer.set_viewport(left, bottom, right, top)
+
         self.block_renderer.draw()
 
     def draw_unproject(self):
         self.trash_spritelist.draw()
 
-    def drag_n_drop_check(self, blocks):
-        if self.dragged_rule_ui.rule_type == "trigger":
+    def _tree_path(self, block):
+        # The blocks from the root down to block with their index among their siblings. Sorting by the indexes gives
+        # the order a depth-first walk over the rulesets would find overlapping blocks in.
+        path = []
+        parent = self.block_renderer._find_parent(block.rule_num)
+        while parent is not None:
+            path.append((parent.children.index(block), block))
+            block, parent = parent, self.block_renderer._find_parent(parent.rule_num)
+        path.append((self.block_renderer.index.root_position(block.rule_num), block))
+
+        return path[::-1]
+
+    def _first_in_tree_order(self, paths):
+        if not paths:
+            return None
+
+        return min(paths, key=lambda path: [index for index, _ in path])[-1][1]
+
+    def drag_n_drop_check(self):
+        dragged = self.dragged_rule_ui
+        if dragged.rule_type == "trigger":
             return
 
-        for block in blocks:
-            if block == self.dragged_rule_ui or (self.dragged_rule_ui.rule in NEEDS_SHAPE and block.rule not in PROVIDES_SHAPE):
+        dragged_rect = arcade.LBWH(dragged.x, dragged.y - 44, 380, 44)
+        paths = []
+
+        for block in self.block_renderer.blocks_in_area(dragged.x, dragged.y - 44, dragged.x + 380, dragged.y):
+            path = self._tree_path(block)
+            # Neither the dragged block's own subtree nor anything under a block that can't take it is a target
+            if any(b == dragged or (dragged.rule in NEEDS_SHAPE and b.rule not in PROVIDES_SHAPE) for _, b in path):
                 continue
 
-            if arcade.LBWH(block.x, block.y - 44, 380, 44).intersection(arcade.LBWH(self.dragged_rule_ui.x, self.dragged_rule_ui.y - 44, 380, 44)):
-                block.children.append(self.dragged_rule_ui)
-                del self.rulesets[self.dragged_rule_ui.rule_num]
-                self.block_renderer.refresh()
-                break
-            else:
-                self.drag_n_drop_check(block.children)
-
-    def remove_from_parent(self, block_to_remove, parents):
-        for parent in parents:
-            if block_to_remove in parent.children:
-                self.rulesets[block_to_remove.rule_num] = block_to_remove 
-                parent.children.remove(block_to_remove)
-                return True
-            if self.remove_from_parent(block_to_remove, parent.children):
-                return True
-        return False
-
-    def press_check(self, event, blocks):
-        for block in blocks:
-            if block == self.dragged_rule_ui:
+            if arcade.LBWH(block.x, block.y - 44, 380, 44).intersection(dragged_rect):
+                paths.append(path)
+
+        block = self._first_in_tree_order(paths)
+        if block is None:
+            return False
+
+        block.children.append(dragged)
+        del self.rulesets[dragged.rule_num]
+        self.block_renderer.index.attach(dragged, block)
+        self.block_renderer.rebuild_block(block)
+        return True
+
+    def remove_from_parent(self, block_to_remove):
+        parent = self.block_renderer._find_parent(block_to_remove.rule_num)
+        if parent is None:
+            return None
+
+        self.rulesets[block_to_remove.rule_num] = block_to_remove
+        parent.children.remove(block_to_remove)
+        self.block_renderer.index.detach(block_to_remove)
+        return parent
+
+    def press_check(self, event):
+        projected_vec = self.camera.unproject((event.x, event.y))
+        point = (projected_vec.x, projected_vec.y)
+        paths = []
+
+        for block in self.block_renderer.blocks_in_area(point[0], point[1], point[0], point[1]):
+            path = self._tree_path(block)
+            if any(b == self.dragged_rule_ui for _, b in path):
                 continue
 
-            projected_vec = self.camera.unproject((event.x, event.y))
-            if arcade.LBWH(block.x, block.y - 44, 380, 44).point_in_rect((projected_vec.x, projected_vec.y)):
-                if block not in list(self.rulesets.values()):  # its children
-                    self.remove_from_parent(block, list(self.rulesets.values()))
-                    self.block_renderer.refresh()
-                self.dragged_rule_ui = block
-                break
-            else:
-                self.press_check(event, block.children)
+            if arcade.LBWH(block.x, block.y - 44, 380, 44).point_in_rect(point):
+                paths.append(path)
+
+        block = self._first_in_tree_order(paths)
+        if block is None:
+            return False
+
+        parent = self.remove_from_parent(block)
+        if parent is not None:
+            self.block_renderer.rebuild_block(parent)
+        self.dragged_rule_ui = block
+        self.block_renderer.begin_drag(block)
+        return True
 
     def on_event(self, event):
         if self.var_edit_dialog:
@@ -510,22 +667,22 @@ class RuleUI(arcade.gui.UIAnchorLayout):
         if isinstance(event, arcade.gui.UIMouseDragEvent):
             if event.buttons == arcade.MOUSE_BUTTON_LEFT:
                 if self.dragged_rule_ui is not None:
-                    self.dragged_rule_ui.x += event.dx
-                    self.dragged_rule_ui.y += event.dy
-                    self.block_renderer.move_block(event.dx, event.dy, self.dragged_rule_ui.rule_num)
+                    self.block_renderer.drag_by(event.dx, event.dy)
 
         elif isinstance(event, arcade.gui.UIMousePressEvent):
             projected_vec = self.camera.unproject((event.x, event.y))
-            var, _ = self.block_renderer.get_var_at_position(projected_vec.x, projected_vec.y)
+            var, rule_num = self.block_renderer.get_var_at_position(projected_vec.x, projected_vec.y)
             
             if var:
-                self.open_var_edit_dialog(var)
+                self.open_var_edit_dialog(var, rule_num)
                 return
             
-            self.press_check(event, list(self.rulesets.values()))
+            self.press_check(event)
 
         elif isinstance(event, arcade.gui.UIMouseReleaseEvent):
             if self.dragged_rule_ui:
+                self.block_renderer.end_drag()
+
                 block_screen_pos = self.camera.project((self.dragged_rule_ui.x, self.dragged_rule_ui.y))
                 
                 block_rect = arcade.LBWH(block_screen_pos[0], block_screen_pos[1], 380, 44)
@@ -537,23 +694,23 @@ class RuleUI(arcade.gui.UIAnchorLayout):
                 )
                 
                 if block_rect.intersection(trash_rect):
-                    self.remove_from_parent(self.dragged_rule_ui, list(self.rulesets.values()))
+                    self.remove_from_parent(self.dragged_rule_ui)
                     
                     if self.dragged_rule_ui.rule_num in self.rulesets:
                         del self.rulesets[self.dragged_rule_ui.rule_num]
 
+                    self.block_renderer.remove_block(self.dragged_rule_ui)
                     self.dragged_rule_ui = None
-                    self.block_renderer.refresh()
                     return
 
-                self.drag_n_drop_check(list(self.rulesets.values()))
+                self.drag_n_drop_check()
 
             self.dragged_rule_ui = None
 
-    def open_var_edit_dialog(self, var: VarBlock):
+    def open_var_edit_dialog(self, var: VarBlock, rule_num: int):
         def on_save():
             self.close_var_edit_dialog()
-            self.block_renderer.refresh()
+            self.block_renderer.rebuild_header(self.block_renderer._find_block(rule_num))
         
         def on_cancel():
             self.close_var_edit_dialog()
@@ -569,7 +726,7 @@ class RuleUI(arcade.gui.UIAnchorLayout):
 
     def on_update(self, dt):
         if self.dragged_rule_ui:
-            block_screen_pos = self.camera.project((self.dragged_rule_ui.x, self.dragged_rule_ui.y))
+            block_screen_pos = self.camera.project(self.block_renderer.drag_position())
             if self.trash_sprite.rect.intersection(arcade.LBWH(block_screen_pos[0], block_screen_pos[1], 380, 44)) and not self.trash_sprite._current_keyframe_index == self.trash_sprite.animation.num_frames - 1:
                 self.trash_sprite.update_animation()
         else:
@@ -0,0 +1,31 @@
+# Destroyed shapes are hidden instead of deleted, so their vertex list slots in the batch can be reused by the
+# next spawn of the same type instead of allocating new ones and fragmenting the batch.
+
+class ShapePool():
+    def __init__(self, capacity_per_type=256):
+        self.capacity_per_type = capacity_per_type
+        self.free = {}
+
+    def release(self, shape):
+        free = self.free.setdefault(shape.shape_type, [])
+
+        if len(free) >= self.capacity_per_type:
+            shape.delete()
+            return
+
+        shape.visible = False
+        free.append(shape)
+
+    def acquire(self, shape_type):
+        free = self.free.get(shape_type)
+        if not free:
+            return None
+
+        return free.pop()
+
+    def clear(self):
+        for free in self.free.values():
+            for shape in free:
+                shape.delete()
+
+        self.free = {}
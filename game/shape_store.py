@@ -0,0 +1,253 @@
+import numpy as np
+
+CIRCLE, RECTANGLE, TRIANGLE, TEXTURED_RECTANGLE = range(4)
+
+def stored_attribute(name):
+    local_name = f"_local_{name}"
+
+    def getter(shape):
+        if shape.store is None:
+            return getattr(shape, local_name)
+        return getattr(shape.store, name)[shape.store_index]
+
+    def setter(shape, value):
+        if shape.store is None:
+            setattr(shape, local_name, value)
+        else:
+            getattr(shape.store, name)[shape.store_index] = value
+
+    return property(getter, setter)
+
+class ShapeStore():
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.count = 0
+        self.next_serial = 0
+        self.shapes = []
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.x_velocity = np.zeros(capacity)
+        self.y_velocity = np.zeros(capacity)
+        # Positions at the start of the current tick, so rendering can interpolate between two ticks
+        self.previous_x = np.zeros(capacity)
+        self.previous_y = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        # circle: (radius, 0, 0, 0), rectangle: (width, height, 0, 0), triangle: vertex 2 and 3 offsets from (x, y)
+        self.extent = np.zeros((capacity, 4))
+        self.color = np.zeros((capacity, 4), dtype=np.uint8)
+        self.type_id = np.zeros(capacity, dtype=np.int8)
+        self.serial = np.zeros(capacity, dtype=np.int64)
+
+        # Where each shape's vertices live inside the render batch, so translations can be written in bulk
+        self.domains = []
+        self.domain_ids = {}
+        self.domain_id = np.full(capacity, -1, dtype=np.int32)
+        self.vertex_start = np.zeros(capacity, dtype=np.int64)
+        self.vertex_count = np.zeros(capacity, dtype=np.int64)
+
+        # Shapes by shape type and by color name, as insertion ordered dicts used as sets, so FOR loops filtered on
+        # either only visit the matching shapes
+        self.shapes_by_type = {}
+        self.shapes_by_color = {}
+
+        self.stored_names = ("x", "y", "x_velocity", "y_velocity")
+        self.array_names = ("x", "y", "x_velocity", "y_velocity", "previous_x", "previous_y", "size", "extent", "color", "type_id", "serial", "domain_id", "vertex_start", "vertex_count")
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        self.capacity *= 2
+
+        for name in self.array_names:
+            old = getattr(self, name)
+            new = np.zeros((self.capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, shape):
+        if self.count == self.capacity:
+            self.grow()
+
+        index = self.count
+
+        self.x[index] = self.previous_x[index] = shape.x
+        self.y[index] = self.previous_y[index] = shape.y
+        self.x_velocity[index] = shape.x_velocity
+        self.y_velocity[index] = shape.y_velocity
+        self.type_id[index] = shape.type_id
+        self.serial[index] = shape.serial = self.next_serial
+        self.next_serial += 1
+
+        shape.store, shape.store_index = self, index
+        self.shapes.append(shape)
+        self.count += 1
+
+        self.shapes_by_type.setdefault(shape.shape_type, {})[shape] = None
+        shape.bucket_color = None
+
+        self.refresh(shape)
+        self.attach_vertex_list(shape)
+
+        return index
+
+    def remove(self, shape):
+        index, last = shape.store_index, self.count - 1
+
+        # Keep the last known state on the shape itself, so it can still be read after removal
+        for name in self.stored_names:
+            setattr(shape, f"_local_{name}", float(getattr(self, name)[index]))
+        shape.store, shape.store_index, shape.serial = None, -1, -1
+        self.remove_from_buckets(shape)
+
+        if index != last:
+            for name in self.array_names:
+                array = getattr(self, name)
+                array[index] = array[last]
+
+            moved = self.shapes[last]
+            moved.store_index = index
+            self.shapes[index] = moved
+
+        self.shapes.pop()
+        self.count -= 1
+
+    def remove_all(self, shapes):
+        # Same as removing the shapes one by one, but the arrays are compacted in one pass
+        if not shapes:
+            return
+
+        keep = np.ones(self.count, dtype=bool)
+        for shape in shapes:
+            index = shape.store_index
+            for name in self.stored_names:
+                setattr(shape, f"_local_{name}", float(getattr(self, name)[index]))
+            shape.store, shape.store_index, shape.serial = None, -1, -1
+            self.remove_from_buckets(shape)
+            keep[index] = False
+
+        kept = np.flatnonzero(keep)
+        for name in self.array_names:
+            array = getattr(self, name)
+            array[:len(kept)] = array[kept]
+
+        first_moved = int(np.argmin(keep))
+        self.shapes[:] = [self.shapes[index] for index in kept.tolist()]
+        for index in range(first_moved, len(self.shapes)):
+            self.shapes[index].store_index = index
+
+        self.count = len(kept)
+
+    def remove_from_buckets(self, shape):
+        del self.shapes_by_type[shape.shape_type][shape]
+        del self.shapes_by_color[shape.bucket_color][shape]
+
+    def refresh(self, shape):
+        index = shape.store_index
+        self.size[index] = shape.shape_size
+        self.extent[index] = shape.extent
+        self.color[index] = shape.color
+
+        if shape.bucket_color != shape.shape_color:
+            if shape.bucket_color is not None:
+                del self.shapes_by_color[shape.bucket_color][shape]
+            self.shapes_by_color.setdefault(shape.shape_color, {})[shape] = None
+            shape.bucket_color = shape.shape_color
+
+    def attach_vertex_list(self, shape):
+        vertex_list = getattr(shape, "_vertex_list", None)
+        index = shape.store_index
+
+        if vertex_list is None:
+            self.domain_id[index] = -1
+            return
+
+        domain = vertex_list.domain
+        if domain not in self.domain_ids:
+            attribute_name = "translation" if "translation" in domain.attrib_name_buffers else "translate"
+            self.domain_ids[domain] = len(self.domains)
+            self.domains.append((domain, attribute_name))
+
+        self.domain_id[index] = self.domain_ids[domain]
+        self.vertex_start[index] = vertex_list.start
+        self.vertex_count[index] = vertex_list.count
+
+    def integrate(self, x_gravity, y_gravity):
+        n = self.count
+        self.x[:n] += self.x_velocity[:n] - x_gravity
+        self.y[:n] += self.y_velocity[:n] - y_gravity
+
+    def snapshot(self):
+        n = self.count
+        self.previous_x[:n] = self.x[:n]
+        self.previous_y[:n] = self.y[:n]
+
+    def sync(self, alpha=1.0):
+        n = self.count
+        domain_id = self.domain_id[:n]
+
+        if alpha >= 1.0:
+            x, y = self.x, self.y
+        else:
+            x = self.previous_x[:n] + (self.x[:n] - self.previous_x[:n]) * alpha
+            y = self.previous_y[:n] + (self.y[:n] - self.previous_y[:n]) * alpha
+
+        for current_id, (domain, attribute_name) in enumerate(self.domains):
+            indices = np.flatnonzero(domain_id == current_id)
+            if not len(indices):
+                continue
+
+            counts = self.vertex_count[indices]
+            vertices = np.arange(counts.sum()) + np.repeat(self.vertex_start[indices] - np.cumsum(counts) + counts, counts)
+
+            buffer = domain.attrib_name_buffers[attribute_name]
+            data = np.ctypeslib.as_array(buffer.data).reshape(-1, buffer.count)
+            data[vertices, 0] = np.repeat(x[indices], counts)
+            data[vertices, 1] = np.repeat(y[indices], counts)
+
+            first_vertex = int(vertices.min())
+            buffer.invalidate_region(first_vertex, int(vertices.max()) + 1 - first_vertex)
+
+    def bounds(self):
+        n = self.count
+        x, y, extent, type_id = self.x[:n], self.y[:n], self.extent[:n], self.type_id[:n]
+
+        is_circle, is_triangle = type_id == CIRCLE, type_id == TRIANGLE
+
+        # Rectangles span (x, y) to (x + width, y + height)
+        left, bottom = x.copy(), y.copy()
+        right, top = x + extent[:, 0], y + extent[:, 1]
+
+        radius = extent[:, 0]
+        left[is_circle] -= radius[is_circle]
+        bottom[is_circle] -= radius[is_circle]
+        top[is_circle] = y[is_circle] + radius[is_circle]
+
+        offsets_x = np.stack((np.zeros(n), extent[:, 0], extent[:, 2]))[:, is_triangle]
+        offsets_y = np.stack((np.zeros(n), extent[:, 1], extent[:, 3]))[:, is_triangle]
+        left[is_triangle] = x[is_triangle] + offsets_x.min(axis=0)
+        right[is_triangle] = x[is_triangle] + offsets_x.max(axis=0)
+        bottom[is_triangle] = y[is_triangle] + offsets_y.min(axis=0)
+        top[is_triangle] = y[is_triangle] + offsets_y.max(axis=0)
+
+        return left, bottom, right, top
+
+    def lowest(self, keys, amount):
+        # The amount shapes with the lowest keys, lowest first. Only those get sorted, finding them is linear.
+        if amount <= 0:
+            return []
+
+        if amount < self.count:
+            indices = np.argpartition(keys, amount - 1)[:amount]
+        else:
+            indices = np.arange(self.count)
+
+        indices = indices[np.lexsort((self.serial[indices], keys[indices]))]
+        return [self.shapes[index] for index in indices]
+
+    def outside(self, left, bottom, right, top):
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        indices = np.flatnonzero((x < left) | (x > right) | (y < bottom) | (y > top))
+        return [self.shapes[index] for index in indices]
@@ -0,0 +1,192 @@
+import random
+import numpy as np
+
+from game.spatial_hash import SpatialHash
+from game.shape_store import ShapeStore
+from game.collision import colliding_pairs
+from game.rule_compiler import compile_rules
+from game.event_dispatcher import EventDispatcher
+from game.eviction import EVICTION_POLICIES
+from game.events import EMPTY_EVENT, DestroyedEvent, ShapeEvent, CollisionEvent
+from game.contacts import ContactTracker
+
+# Everything the rules can do to the world, without any window or rendering. Game draws it with a pyglet batch,
+# HeadlessSimulation just runs it. Subclasses only have to implement create_shape.
+
+class Simulation():
+    def __init__(self, settings, world_width, world_height, seed=None):
+        self.settings = settings
+        self.world_width = world_width
+        self.world_height = world_height
+        self.random = random.Random(seed)
+
+        self.x_gravity = self.settings.get("default_x_gravity", 0)
+        self.y_gravity = self.settings.get("default_y_gravity", 5)
+        self.event_dispatcher = EventDispatcher(self.settings.get("max_events_per_tick", 1000), self.settings.get("max_rules_per_tick", 10000))
+        self.triggered_events = self.event_dispatcher.queue
+
+        self.shape_store = ShapeStore()
+        self.shapes = self.shape_store.shapes
+        self.spatial_hash = SpatialHash(self.settings.get("collision_cell_size", 64))
+        self.contacts = ContactTracker()
+        # Contact phases the loaded collides rules react to, no events are made for the others
+        self.contact_phases = set()
+        self.contact_persist_interval = self.settings.get("contact_persist_interval", 1)
+        self.tick_count = 0
+
+        self.eviction_keys = EVICTION_POLICIES.get(self.settings.get("eviction_policy", "Oldest"), EVICTION_POLICIES["Oldest"])
+        self.eviction_random = np.random.default_rng(seed)
+
+        # Set to a PhaseTimer to record how long each part of a tick takes
+        self.phase_timer = None
+
+    def load_rules(self, rulesets):
+        self.event_dispatcher.load(compile_rules(rulesets, self))
+
+        self.contacts.clear()
+        self.contact_phases = {block.vars[2].value for block in rulesets.values() if block.rule_type == "trigger" and block.rule == "collides"}
+
+    def reset_world(self):
+        self.x_gravity = self.settings.get("default_x_gravity", 0)
+        self.y_gravity = self.settings.get("default_y_gravity", 5)
+        self.event_dispatcher.clear()
+        self.contacts.clear()
+
+    def create_shape(self, shape_type, x, y):
+        raise NotImplementedError
+
+    def release_shape(self, shape):
+        shape.delete()
+
+    def move_x(self, a, shape):
+        shape.x += float(a)
+
+    def move_y(self, a, shape):
+        shape.y += float(a)
+
+    def change_x(self, a, shape):
+        shape.x = float(a)
+
+    def change_y(self, a, shape):
+        shape.y = float(a)
+
+    def change_x_velocity(self, a, shape):
+        a = float(a)
+        shape.x_velocity = a
+        self.triggered_events.append(["x_velocity_change", ShapeEvent(shape)])
+
+    def change_y_velocity(self, a, shape):
+        a = float(a)
+        shape.y_velocity = a
+        self.triggered_events.append(["y_velocity_change", ShapeEvent(shape)])
+
+    def change_x_gravity(self, a):
+        a = float(a)
+        self.x_gravity = a
+        self.triggered_events.append(["x_gravity_change", EMPTY_EVENT])
+
+    def change_y_gravity(self, a):
+        a = float(a)
+        self.y_gravity = a
+        self.triggered_events.append(["y_gravity_change", EMPTY_EVENT])
+
+    def change_color(self, a, shape):
+        shape.shape_color = a
+        self.shape_store.refresh(shape)
+        self.triggered_events.append(["color_changes", ShapeEvent(shape)])
+
+    def destroy(self, shape):
+        if not shape.alive:
+            return
+
+        self.triggered_events.append(["destroyed", DestroyedEvent(shape.shape_type)])
+        shape.alive = False
+        self.shape_store.remove(shape)
+        self.release_shape(shape)
+
+    def destroy_all(self, shapes):
+        shapes = [shape for shape in shapes if shape.alive]
+
+        for shape in shapes:
+            self.triggered_events.append(["destroyed", DestroyedEvent(shape.shape_type)])
+            shape.alive = False
+
+        self.shape_store.remove_all(shapes)
+
+        for shape in shapes:
+            self.release_shape(shape)
+
+    def change_size(self, a, shape):
+        shape.set_size(float(a))
+        self.shape_store.refresh(shape)
+        self.triggered_events.append(["size_changes", ShapeEvent(shape)])
+
+    def spawn(self, shape_type):
+        x = self.random.randint(int(self.world_width * 0.15) + 50, int(self.world_width * 0.75) - 50)
+        y = self.random.randint(100, self.world_height - 100)
+
+        shape = self.create_shape(shape_type, x, y)
+
+        self.shape_store.add(shape)
+        self.triggered_events.append(["spawns", ShapeEvent(shape)])
+
+    def evict_excess_shapes(self):
+        excess = len(self.shapes) - self.settings.get("max_shapes", 120)
+        if excess <= 0:
+            return
+
+        keys = self.eviction_keys(self.shape_store, (self.world_width / 2, self.world_height / 2), self.eviction_random)
+        self.destroy_all(self.shape_store.lowest(keys, excess))
+
+    def detect_collisions(self):
+        self.spatial_hash.rebuild(list(zip(*(bound.tolist() for bound in self.shape_store.bounds()))))
+
+        candidates = np.array(list(self.spatial_hash.candidate_pairs()), dtype=np.int64).reshape(-1, 2)
+        colliding_a, colliding_b = colliding_pairs(self.shape_store, candidates[:, 0], candidates[:, 1])
+
+        begins, (touching_a, touching_b), ends = self.contacts.update(self.shape_store, colliding_a, colliding_b)
+
+        if "begin" in self.contact_phases:
+            for shape, shape_b in begins:
+                self.triggered_events.append(["collides", CollisionEvent(shape, shape_b, "begin")])
+
+        if "persist" in self.contact_phases and self.tick_count % self.contact_persist_interval == 0:
+            # Pairs touching since an earlier tick, plus the ones that just began, as persist fires on every tick of a contact
+            for shape, shape_b in begins:
+                self.triggered_events.append(["collides", CollisionEvent(shape, shape_b, "persist")])
+            for i, j in zip(touching_a.tolist(), touching_b.tolist()):
+                self.triggered_events.append(["collides", CollisionEvent(self.shapes[i], self.shapes[j], "persist")])
+
+        if "end" in self.contact_phases:
+            for shape, shape_b in ends:
+                self.triggered_events.append(["collides", CollisionEvent(shape, shape_b, "end")])
+
+    def tick(self):
+        phase_timer = self.phase_timer
+        if phase_timer is not None:
+            phase_timer.begin()
+
+        self.tick_count += 1
+        self.shape_store.snapshot()
+        self.triggered_events.append(["every_update", EMPTY_EVENT])
+
+        self.event_dispatcher.run(phase_timer)
+
+        self.shape_store.integrate(self.x_gravity, self.y_gravity)
+
+        if phase_timer is not None:
+            phase_timer.lap("integration")
+
+        if self.event_dispatcher.has_rules("collides"):
+            self.detect_collisions()
+
+        if phase_timer is not None:
+            phase_timer.lap("collision")
+
+        self.destroy_all(self.shape_store.outside(0, 0, self.world_width, self.world_height))
+
+        self.evict_excess_shapes()
+
+        if phase_timer is not None:
+            phase_timer.lap("culling")
+            phase_timer.end()
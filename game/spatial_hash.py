@@ -0,0 +1,146 @@
+import math
+
+class SpatialHash():
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.bounds = []
+        self.cell_ranges = []
+
+    def clear(self):
+        self.cells.clear()
+        self.bounds = []
+        self.cell_ranges = []
+
+    def get_cell_range(self, left, bottom, right, top):
+        inverse_cell_size = 1 / self.cell_size
+        return (
+            math.floor(left * inverse_cell_size),
+            math.floor(bottom * inverse_cell_size),
+            math.floor(right * inverse_cell_size),
+            math.floor(top * inverse_cell_size)
+        )
+
+    def rebuild(self, bounds):
+        self.clear()
+        self.bounds = bounds
+
+        cells = self.cells
+        for index, shape_bounds in enumerate(bounds):
+            cell_range = self.get_cell_range(*shape_bounds)
+            self.cell_ranges.append(cell_range)
+
+            min_cx, min_cy, max_cx, max_cy = cell_range
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is None:
+                        cells[(cx, cy)] = [index]
+                    else:
+                        cell.append(index)
+
+    def candidate_pairs(self):
+        bounds, cell_ranges = self.bounds, self.cell_ranges
+
+        for (cx, cy), indices in self.cells.items():
+            if len(indices) < 2:
+                continue
+
+            for n, a in enumerate(indices):
+                a_left, a_bottom, a_right, a_top = bounds[a]
+                a_min_cx, a_min_cy = cell_ranges[a][0], cell_ranges[a][1]
+
+                for b in indices[n + 1:]:
+                    # A pair sharing several cells is only reported from the first cell they share
+                    if max(a_min_cx, cell_ranges[b][0]) != cx or max(a_min_cy, cell_ranges[b][1]) != cy:
+                        continue
+
+                    b_left, b_bottom, b_right, b_top = bounds[b]
+                    if a_right < b_left or b_right < a_left or a_top < b_bottom or b_top < a_bottom:
+                        continue
+
+                    yield a, b
+
+class SpatialGrid():
+    # Unlike SpatialHash, entries are added, moved and removed one at a time, for the rules canvas where only a
+    # few rectangles change between hit tests
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = {}
+        self.items = {}
+        self.cell_ranges = {}
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.items.clear()
+        self.cell_ranges.clear()
+
+    def get_cell_range(self, left, bottom, right, top):
+        inverse_cell_size = 1 / self.cell_size
+        return (
+            math.floor(left * inverse_cell_size),
+            math.floor(bottom * inverse_cell_size),
+            math.floor(right * inverse_cell_size),
+            math.floor(top * inverse_cell_size)
+        )
+
+    def _add_to_cells(self, key, cell_range):
+        min_cx, min_cy, max_cx, max_cy = cell_range
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self.cells.setdefault((cx, cy), set()).add(key)
+
+    def _remove_from_cells(self, key, cell_range):
+        min_cx, min_cy, max_cx, max_cy = cell_range
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                cell = self.cells[(cx, cy)]
+                cell.discard(key)
+                if not cell:
+                    del self.cells[(cx, cy)]
+
+    def insert(self, key, rect, item):
+        if key in self.rects:
+            self.remove(key)
+
+        cell_range = self.get_cell_range(*rect)
+        self.rects[key] = rect
+        self.items[key] = item
+        self.cell_ranges[key] = cell_range
+        self._add_to_cells(key, cell_range)
+
+    def remove(self, key):
+        if key not in self.rects:
+            return
+
+        self._remove_from_cells(key, self.cell_ranges.pop(key))
+        del self.rects[key]
+        del self.items[key]
+
+    def move(self, key, dx, dy):
+        if key not in self.rects:
+            return
+
+        left, bottom, right, top = self.rects[key]
+        rect = (left + dx, bottom + dy, right + dx, top + dy)
+        cell_range = self.get_cell_range(*rect)
+
+        if cell_range != self.cell_ranges[key]:
+            self._remove_from_cells(key, self.cell_ranges[key])
+            self._add_to_cells(key, cell_range)
+            self.cell_ranges[key] = cell_range
+
+        self.rects[key] = rect
+
+    def query(self, left, bottom, right, top):
+        # Every entry sharing a cell with the area, callers still have to test the exact rectangles
+        min_cx, min_cy, max_cx, max_cy = self.get_cell_range(left, bottom, right, top)
+
+        keys = set()
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                keys.update(self.cells.get((cx, cy), ()))
+
+        return [(key, self.items[key]) for key in keys]
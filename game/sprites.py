@@ -1,24 +1,51 @@
-import pyglet, arcade.color, math, json
+import pyglet, arcade.color, math, json, os
+
+from game.shape_store import stored_attribute, CIRCLE, RECTANGLE, TRIANGLE, TEXTURED_RECTANGLE
 
 # I am so sorry but this file has AI code cause i didn't have enough time to implement collision :C
 
-with open("settings.json", "r") as file:
-    settings = json.load(file)
+# settings.json only exists once the game has been started, tests import this module without it
+settings = {}
+if os.path.exists("settings.json"):
+    with open("settings.json", "r") as file:
+        settings = json.load(file)
 
 class BaseShape():
+    store = None
+    store_index = -1
+    serial = -1 # set by the ShapeStore while the shape is in it
+
+    _local_x = 0.0
+    _local_y = 0.0
+
+    # Position and velocity live in the ShapeStore once the shape is added to it
+    _x = stored_attribute("x")
+    _y = stored_attribute("y")
+    x_velocity = stored_attribute("x_velocity")
+    y_velocity = stored_attribute("y_velocity")
+
     def __init__(self):
         self.shape_type = ""
+        self.alive = True
 
         self.x_velocity = settings.get("default_x_velocity", 0)
         self.y_velocity = settings.get("default_y_velocity", 0)
         self._shape_color = "WHITE"
-    
-    def update(self, x_gravity, y_gravity):
-        self.x += self.x_velocity
-        self.y += self.y_velocity
-        self.x -= x_gravity
-        self.y -= y_gravity
-    
+
+    def reuse(self, x, y):
+        self.alive = True
+        self.x, self.y = x, y
+
+        self.x_velocity = settings.get("default_x_velocity", 0)
+        self.y_velocity = settings.get("default_y_velocity", 0)
+        self.shape_color = "WHITE"
+
+        self.reset_size()
+        self.visible = True
+
+    def reset_size(self):
+        self.set_size(self.spawn_size)
+
     @property
     def shape_color(self):
         return self._shape_color
@@ -37,15 +64,25 @@ class BaseShape():
             return self._collides_with_triangle(other)
         return False
 
-class Circle(pyglet.shapes.Circle, BaseShape):
+class Circle(BaseShape, pyglet.shapes.Circle):
+    type_id = CIRCLE
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+        pyglet.shapes.Circle.__init__(self, *args, **kwargs)
         BaseShape.__init__(self)
         self.shape_type = "circle"
+        self.spawn_size = self.shape_size
     
     @property
     def shape_size(self):
         return self.radius
+
+    @property
+    def extent(self):
+        return self.radius, 0, 0, 0
+
+    def set_size(self, size):
+        self.radius = size
     
     def _collides_with_circle(self, other):
         dx = self.x - other.x
@@ -113,6 +150,14 @@ class BaseRectangle(BaseShape):
     @property
     def shape_size(self):
         return self.width
+
+    @property
+    def extent(self):
+        return self.width, self.height, 0, 0
+
+    def set_size(self, size):
+        self.width = size
+        self.height = size
     
     def _collides_with_circle(self, circle):
         return circle._collides_with_rectangle(self)
@@ -179,30 +224,100 @@ class BaseRectangle(BaseShape):
         return (ccw(x1, y1, x3, y3, x4, y4) != ccw(x2, y2, x3, y3, x4, y4) and
                 ccw(x1, y1, x2, y2, x3, y3) != ccw(x1, y1, x2, y2, x4, y4))
 
-class Rectangle(pyglet.shapes.Rectangle, BaseRectangle):
+class Rectangle(BaseRectangle, pyglet.shapes.Rectangle):
+    type_id = RECTANGLE
+
     def __init__(self, *args, **kwargs):
         BaseRectangle.__init__(self)
-        super().__init__(*args, **kwargs)
+        pyglet.shapes.Rectangle.__init__(self, *args, **kwargs)
         self.shape_type = "rectangle"
+        self.spawn_size = self.shape_size
+
+class TexturedRectangle(BaseRectangle, pyglet.sprite.Sprite):
+    type_id = TEXTURED_RECTANGLE
 
-class TexturedRectangle(pyglet.sprite.Sprite, BaseRectangle):
     def __init__(self, img, x=0, y=0, *args, **kwargs):
         BaseRectangle.__init__(self)
         self.shape_type = kwargs.pop("shape_type", "textured_rectangle")
-        super().__init__(img, x, y, *args, **kwargs)
+        pyglet.sprite.Sprite.__init__(self, img, x, y, *args, **kwargs)
 
-    def update(self, x_gravity, y_gravity):
-        BaseShape.update(self, x_gravity, y_gravity)
+    def reset_size(self):
+        self.scale = 1
+        self.scale_x = 1
+        self.scale_y = 1
 
-class Triangle(pyglet.shapes.Triangle, BaseShape):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+class Triangle(BaseShape, pyglet.shapes.Triangle):
+    type_id = TRIANGLE
+
+    # pyglet's getters add (x, y) to the second and third vertex, so they are kept as offsets from (x, y).
+    # That way the whole triangle moves with x and y like every other shape.
+    def __init__(self, x, y, x2, y2, x3, y3, *args, **kwargs):
+        pyglet.shapes.Triangle.__init__(self, x, y, x2 - x, y2 - y, x3 - x, y3 - y, *args, **kwargs)
         BaseShape.__init__(self)
         self.shape_type = "triangle"
-    
+        self.spawn_size = self.shape_size
+
+    def _get_vertices(self):
+        if not self._visible:
+            return (0, 0) * self._num_verts
+
+        x1, y1 = -self._anchor_x, -self._anchor_y
+        return x1, y1, x1 + self._x2, y1 + self._y2, x1 + self._x3, y1 + self._y3
+
+    @property
+    def x2(self):
+        return self._x + self._x2
+
+    @x2.setter
+    def x2(self, value):
+        self._x2 = value - self._x
+        self._update_vertices()
+
+    @property
+    def y2(self):
+        return self._y + self._y2
+
+    @y2.setter
+    def y2(self, value):
+        self._y2 = value - self._y
+        self._update_vertices()
+
+    @property
+    def x3(self):
+        return self._x + self._x3
+
+    @x3.setter
+    def x3(self, value):
+        self._x3 = value - self._x
+        self._update_vertices()
+
+    @property
+    def y3(self):
+        return self._y + self._y3
+
+    @y3.setter
+    def y3(self, value):
+        self._y3 = value - self._y
+        self._update_vertices()
+
     @property
     def shape_size(self):
-        return max(self.x, self.x2, self.x3) - min(self.x, self.x2, self.x3)
+        return max(0, self._x2, self._x3) - min(0, self._x2, self._x3)
+
+    @property
+    def extent(self):
+        return self._x2, self._y2, self._x3, self._y3
+
+    def set_size(self, size):
+        current_size = self.shape_size
+
+        if current_size:
+            scale = size / current_size
+            self._x2, self._y2, self._x3, self._y3 = self._x2 * scale, self._y2 * scale, self._x3 * scale, self._y3 * scale
+        else:
+            self._x2, self._y2, self._x3, self._y3 = size, 0, size / 2, size
+
+        self._update_vertices()
     
     def _collides_with_circle(self, circle):
         return circle._collides_with_triangle(self)
@@ -0,0 +1,46 @@
+import argparse, json, os, time
+
+from utils.constants import SPRITES
+
+from game.blocks import load_rulesets
+from game.headless import HeadlessSimulation
+
+parser = argparse.ArgumentParser(description="Run exported Chaos Protocol rules without a window.")
+parser.add_argument("rules_file", help="rules JSON exported from the game")
+parser.add_argument("--ticks", type=int, default=1000, help="number of ticks to simulate")
+parser.add_argument("--width", type=int, help="virtual world width (defaults to the resolution in settings.json)")
+parser.add_argument("--height", type=int, help="virtual world height (defaults to the resolution in settings.json)")
+parser.add_argument("--seed", type=int, help="seed for shape spawn positions")
+parser.add_argument("--settings", default="settings.json", help="settings file to read gravity, velocity and shape limits from")
+args = parser.parse_args()
+
+if os.path.exists(args.settings):
+    with open(args.settings, "r") as file:
+        settings = json.load(file)
+else:
+    settings = {}
+
+width, height = map(int, settings.get("resolution", "1920x1080").split("x"))
+width, height = args.width or width, args.height or height
+
+with open(args.rules_file, "r") as file:
+    data = json.load(file)
+
+sprite_types = {**SPRITES, **data.get("sprites", {})}
+
+simulation = HeadlessSimulation(settings, width, height, sprite_types, args.seed)
+simulation.load_rules(load_rulesets(data))
+
+start = time.perf_counter()
+simulation.run(args.ticks)
+elapsed = time.perf_counter() - start
+
+print(f"{args.ticks} ticks in {elapsed:.3f}s ({args.ticks / elapsed if elapsed else float('inf'):.1f} ticks/sec)")
+print(f"{len(simulation.shapes)} shapes left")
+
+dispatcher = simulation.event_dispatcher
+if dispatcher.overflow_ticks:
+    print(f"{dispatcher.overflow_ticks} ticks went over the event budget, {dispatcher.total_deferred} events deferred and {dispatcher.total_skipped_loops} FOR loops skipped in total")
+
+for shape_type, count in sorted(simulation.shape_counts().items()):
+    print(f"  {shape_type}: {count}")
@@ -0,0 +1,154 @@
+import argparse, csv, itertools, json, os, time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.constants import SPRITES
+
+from game.blocks import load_rulesets
+from game.headless import HeadlessSimulation
+from game.phase_timer import PhaseTimer
+from game.events import EMPTY_EVENT
+from benchmarks.fuzzer import BudgetExceeded, install_budget
+
+# Runs every combination of rule file, seed and setting values headless, one process per job, and appends a row per
+# finished run to one CSV table. Runs already in the table are skipped, so an interrupted sweep continues where it stopped.
+
+COLUMNS = ["rules_file", "seed", "settings", "ticks", "seconds", "ticks_per_second", "peak_shapes", "end_shapes", "rules_evaluated", "events", "error"]
+
+def parse_seeds(text):
+    seeds = []
+
+    for part in text.split(","):
+        if "-" in part[1:]: # a range, the first character can be the sign of a negative seed
+            first, last = part.rsplit("-", 1)
+            seeds.extend(range(int(first), int(last) + 1))
+        else:
+            seeds.append(int(part))
+
+    return seeds
+
+def parse_setting(text):
+    key, values = text.split("=", 1)
+    parsed = []
+
+    for value in values.split(","):
+        try:
+            parsed.append(json.loads(value))
+        except json.JSONDecodeError:
+            parsed.append(value)
+
+    return key, parsed
+
+def job_key(rules_file, seed, overrides):
+    return (rules_file, str(seed), json.dumps(overrides, sort_keys=True))
+
+def run_job(rules_file, seed, settings, overrides, ticks, time_limit, world_size):
+    simulation, peak_shapes, ticks_run, error = None, 0, 0, ""
+    start = time.perf_counter()
+
+    try: # a rule file that can't be loaded or breaks the simulation shouldn't stop the sweep
+        with open(rules_file, "r") as file:
+            data = json.load(file)
+
+        simulation = HeadlessSimulation({**settings, **overrides}, *world_size, {**SPRITES, **data.get("sprites", {})}, seed)
+        simulation.load_rules(load_rulesets(data))
+        simulation.phase_timer = PhaseTimer()
+        simulation.triggered_events.append(["start", EMPTY_EVENT])
+
+        # Checks the time limit inside the tick too, so one runaway tick can't block the worker
+        dispatcher = install_budget(simulation, float("inf"), time_limit, keep_limits=True) if time_limit else None
+
+        start = time.perf_counter()
+        for ticks_run in range(1, ticks + 1):
+            if dispatcher is not None:
+                dispatcher.tick_seconds = time_limit - (time.perf_counter() - start)
+
+            simulation.tick()
+            peak_shapes = max(peak_shapes, len(simulation.shapes))
+
+            if time_limit and time.perf_counter() - start > time_limit:
+                error = "time limit"
+                break
+    except BudgetExceeded:
+        error = "time limit"
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+
+    elapsed = time.perf_counter() - start
+    event_summary = simulation.phase_timer.event_summary() if simulation is not None and simulation.phase_timer is not None else {"rules_evaluated": 0, "events": {}}
+
+    return {
+        "rules_file": rules_file,
+        "seed": seed,
+        "settings": json.dumps(overrides, sort_keys=True),
+        "ticks": ticks_run,
+        "seconds": round(elapsed, 4),
+        "ticks_per_second": round(ticks_run / elapsed, 1) if elapsed else "",
+        "peak_shapes": peak_shapes,
+        "end_shapes": len(simulation.shapes) if simulation is not None else 0,
+        "rules_evaluated": event_summary["rules_evaluated"],
+        "events": json.dumps(event_summary["events"]),
+        "error": error
+    }
+
+def finished_jobs(output):
+    if not os.path.exists(output):
+        return set()
+
+    with open(output, "r", newline="") as file:
+        return {job_key(row["rules_file"], row["seed"], json.loads(row["settings"])) for row in csv.DictReader(file)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run rule files over many seeds and settings in parallel, without a window.")
+    parser.add_argument("rules_files", nargs="+", help="rules JSON files exported from the game")
+    parser.add_argument("--seeds", default="0", help="seeds to run, like 0-9 or 1,5,7 (default 0)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUES", help="setting values to sweep, like default_y_gravity=0,5,10, can be repeated")
+    parser.add_argument("--ticks", type=int, default=1000, help="ticks per run")
+    parser.add_argument("--time-limit", type=float, default=0, help="seconds after which a run is stopped (0 for no limit)")
+    parser.add_argument("--width", type=int, default=1920, help="virtual world width")
+    parser.add_argument("--height", type=int, default=1080, help="virtual world height")
+    parser.add_argument("--settings", default="settings.json", help="settings file the swept values are applied on top of")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes (defaults to the CPU count)")
+    parser.add_argument("--output", default="sweep_results.csv", help="CSV table the runs are appended to")
+    parser.add_argument("--restart", action="store_true", help="start over instead of skipping the runs already in the output")
+    args = parser.parse_args()
+
+    if os.path.exists(args.settings):
+        with open(args.settings, "r") as file:
+            settings = json.load(file)
+    else:
+        settings = {}
+
+    swept = dict(parse_setting(text) for text in args.set)
+    combinations = [dict(zip(swept, values)) for values in itertools.product(*swept.values())]
+    jobs = [(rules_file, seed, overrides) for rules_file in args.rules_files for seed in parse_seeds(args.seeds) for overrides in combinations]
+
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+
+    done = finished_jobs(args.output)
+    pending = [job for job in jobs if not job_key(*job) in done]
+
+    print(f"{len(jobs)} runs, {len(jobs) - len(pending)} already done, {len(pending)} to go on {args.workers} processes")
+
+    write_header = not os.path.exists(args.output)
+    start = time.perf_counter()
+
+    with open(args.output, "a", newline="") as file, ProcessPoolExecutor(max_workers=args.workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        if write_header:
+            writer.writeheader()
+
+        futures = [
+            executor.submit(run_job, rules_file, seed, settings, overrides, args.ticks, args.time_limit, (args.width, args.height))
+            for rules_file, seed, overrides in pending
+        ]
+
+        for finished, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            writer.writerow(row)
+            file.flush() # so an interrupted sweep keeps every finished run
+
+            print(f"[{finished}/{len(pending)}] {row['rules_file']} seed {row['seed']} {row['settings']}: {row['ticks_per_second']} ticks/sec, peak {row['peak_shapes']} shapes{' (' + row['error'] + ')' if row['error'] else ''}")
+
+    print(f"Done in {time.perf_counter() - start:.1f}s, results in {args.output}")
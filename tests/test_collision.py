@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+
+from game.shape_store import ShapeStore
+from game.collision import colliding_pairs
+from game.headless import VirtualCircle, VirtualRectangle, VirtualTriangle
+from game.sprites import Circle, Rectangle, Triangle
+
+# The batched kernels must agree with the per-object check_collision they replace. The sprites are made without
+# pyglet's __init__ (that needs a window), with just the fields their collision methods read.
+
+SHAPE_TYPES = ("circle", "rectangle", "textured_rectangle", "triangle")
+
+def sprite(sprite_class, x, y, **fields):
+    shape = sprite_class.__new__(sprite_class)
+    shape._local_x, shape._local_y = x, y
+
+    for name, value in fields.items():
+        setattr(shape, f"_{name}", value)
+
+    return shape
+
+def random_shape(rng, shape_type):
+    # Returns the headless shape for the store and its sprite twin with the same geometry
+    x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+
+    if shape_type == "circle":
+        radius = rng.uniform(1, 25)
+        return VirtualCircle(x, y, radius, 0, 0), sprite(Circle, x, y, radius=radius)
+
+    if shape_type == "triangle":
+        offsets = tuple(rng.uniform(-40, 40) for _ in range(4))
+        return VirtualTriangle(x, y, offsets, 0, 0), sprite(Triangle, x, y, x2=offsets[0], y2=offsets[1], x3=offsets[2], y3=offsets[3])
+
+    width, height = rng.uniform(1, 40), rng.uniform(1, 40)
+    return VirtualRectangle(shape_type, x, y, width, height, 0, 0), sprite(Rectangle, x, y, width=width, height=height)
+
+def test_colliding_pairs_matches_check_collision():
+    rng = random.Random(1234)
+    store = ShapeStore()
+    shapes, sprites = [], []
+
+    for shape_type in SHAPE_TYPES:
+        for _ in range(25):
+            shape, shape_sprite = random_shape(rng, shape_type)
+            store.add(shape)
+            shapes.append(shape)
+            sprites.append(shape_sprite)
+
+    # Every ordered pair, so each pair of shape types is checked in both orientations
+    pairs = [(a, b) for a in range(len(shapes)) for b in range(len(shapes)) if a != b]
+    a = np.array([shapes[n].store_index for n, _ in pairs], dtype=np.int64)
+    b = np.array([shapes[n].store_index for _, n in pairs], dtype=np.int64)
+
+    hits_a, hits_b = colliding_pairs(store, a, b)
+    hits = set(zip(hits_a.tolist(), hits_b.tolist()))
+
+    outcomes = {}
+    for n, m in pairs:
+        expected = sprites[n].check_collision(sprites[m])
+        got = (shapes[n].store_index, shapes[m].store_index) in hits
+        assert got == expected, f"{shapes[n].shape_type} {n} against {shapes[m].shape_type} {m}"
+
+        outcomes.setdefault((shapes[n].shape_type, shapes[m].shape_type), set()).add(expected)
+
+    # The shapes are dense enough that every type pair has both hits and misses
+    assert len(outcomes) == len(SHAPE_TYPES) ** 2
+    assert all(seen == {True, False} for seen in outcomes.values())
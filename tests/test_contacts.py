@@ -0,0 +1,71 @@
+import numpy as np
+
+from game.shape_store import ShapeStore
+from game.contacts import ContactTracker, RemovedShape
+from game.headless import VirtualCircle
+
+def make_store(count):
+    store = ShapeStore()
+    shapes = [VirtualCircle(n * 10, 0, 10, 0, 0) for n in range(count)]
+    for shape in shapes:
+        store.add(shape)
+
+    return store, shapes
+
+def touching(store, *pairs):
+    a = np.array([store.shapes.index(shape) for shape, _ in pairs], dtype=np.int64)
+    b = np.array([store.shapes.index(shape_b) for _, shape_b in pairs], dtype=np.int64)
+    return a, b
+
+def reuse(store, shape):
+    # What the ShapePool does with a destroyed shape on the next spawn of its type
+    store.remove(shape)
+    shape.alive = True
+    store.add(shape)
+
+def test_begin_persist_end():
+    store, (circle_a, circle_b) = make_store(2)
+    tracker = ContactTracker()
+
+    begins, (persist_a, _), ends = tracker.update(store, *touching(store, (circle_a, circle_b)))
+    assert begins == [(circle_a, circle_b)] and len(persist_a) == 0 and ends == []
+
+    begins, (persist_a, persist_b), ends = tracker.update(store, *touching(store, (circle_a, circle_b)))
+    assert begins == [] and (persist_a.tolist(), persist_b.tolist()) == ([0], [1]) and ends == []
+
+    begins, (persist_a, _), ends = tracker.update(store, *touching(store))
+    assert begins == [] and len(persist_a) == 0 and ends == [(circle_a, circle_b)]
+
+def test_end_by_destroyed_second_shape():
+    store, (circle_a, circle_b) = make_store(2)
+    tracker = ContactTracker()
+    tracker.update(store, *touching(store, (circle_a, circle_b)))
+
+    reuse(store, circle_b)
+    _, _, ends = tracker.update(store, *touching(store))
+
+    assert len(ends) == 1
+    shape, shape_b = ends[0]
+    assert shape is circle_a
+    assert isinstance(shape_b, RemovedShape) and shape_b.shape_type == "circle"
+
+def test_end_by_destroyed_first_shape_is_dropped():
+    store, (circle_a, circle_b) = make_store(2)
+    tracker = ContactTracker()
+    tracker.update(store, *touching(store, (circle_a, circle_b)))
+
+    reuse(store, circle_a)
+    _, _, ends = tracker.update(store, *touching(store))
+
+    assert ends == []
+
+def test_reused_shape_begins_a_new_contact():
+    store, (circle_a, circle_b) = make_store(2)
+    tracker = ContactTracker()
+    tracker.update(store, *touching(store, (circle_a, circle_b)))
+
+    reuse(store, circle_b)
+    begins, _, ends = tracker.update(store, *touching(store, (circle_a, circle_b)))
+
+    assert begins == [(circle_a, circle_b)]
+    assert len(ends) == 1 and isinstance(ends[0][1], RemovedShape)
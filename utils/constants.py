@@ -25,7 +25,7 @@ FOR_COLOR = (255, 182, 193)
 COLORS = [
     "BLACK", "WHITE", "GRAY", "DARK_GRAY", "CYAN", 
     "AMBER", "AQUA", "GREEN", "LIGHT_GREEN",
-    "RED", "LIGHT_RED", "DARK_RED",
+    "RED", "DARK_RED",
     "BLUE", "LIGHT_BLUE", "DARK_BLUE",
     "YELLOW", "LIGHT_YELLOW", "DARK_YELLOW",
     "MAGENTA", "PURPLE", "VIOLET", "INDIGO",
@@ -38,6 +38,9 @@ COLORS = [
 
 COMPARISONS = [">", ">=", "<", "<=", "==", "!="]
 
+# begin: the first tick two shapes touch, persist: every tick they keep touching, end: the tick they separate
+CONTACT_PHASES = ["begin", "persist", "end"]
+
 OPS = {
     ">": operator.gt,
     "<": operator.lt,
@@ -54,7 +57,8 @@ VAR_DEFAULT = {
     "color": "WHITE",
     "size": 10,
     "key_input": ALLOWED_INPUT[0],
-    "comparison": COMPARISONS[0]
+    "comparison": COMPARISONS[0],
+    "contact": CONTACT_PHASES[0]
 }
 
 VAR_OPTIONS = {
@@ -64,7 +68,8 @@ VAR_OPTIONS = {
     "color": COLORS,
     "size": (1, 200),
     "key_input": ALLOWED_INPUT,
-    "comparison": COMPARISONS
+    "comparison": COMPARISONS,
+    "contact": CONTACT_PHASES
 }
 
 VAR_TYPES = {
@@ -74,7 +79,8 @@ VAR_TYPES = {
     "color": "Color",
     "size": "Size",
     "key_input": "Key Input",
-    "comparison": "Comparison"
+    "comparison": "Comparison",
+    "contact": "Contact"
 }
 
 TRIGGER_RULES = {
@@ -129,10 +135,10 @@ TRIGGER_RULES = {
     },
     "collides": {
         "key": "collides",
-        "description": "IF {a} shape collides with {b}",
-        "user_vars": ["shape_type", "target_type"],
-        "vars": ["shape_type", "target_type", "event_a_type", "event_b_type"],
-        "func": lambda *v: (v[0] == v[2]) and (v[3] == v[1])
+        "description": "IF {a} shape collides with {b} on {c}",
+        "user_vars": ["shape_type", "target_type", "contact"],
+        "vars": ["shape_type", "target_type", "contact", "event_a_type", "event_b_type", "event_contact"],
+        "func": lambda *v: (v[0] == v[3]) and (v[4] == v[1]) and (v[2] == v[5])
     },
     "on_left_click": {
         "key": "on_left_click",
@@ -354,6 +360,7 @@ NEEDS_SHAPE = [
     "change_x_velocity",
     "change_y_velocity",
     "change_size",
+    "change_color",
     "destroy",
 ]
 
@@ -379,6 +386,7 @@ RULE_DEFAULTS = {
 
 menu_background_color = (30, 30, 47)
 log_dir = 'logs'
+profile_dir = 'profiles' # kept apart from log_dir, which run.py trims to the newest few files
 discord_presence_id = 1440807203094138940
 
 button_style = {'normal': UITextureButtonStyle(font_name="Roboto", font_color=arcade.color.BLACK), 'hover': UITextureButtonStyle(font_name="Roboto", font_color=arcade.color.BLACK),
@@ -412,9 +420,19 @@ settings = {
         "Default X gravity": {"type": "slider", "min": -999, "max": 999, "config_key": "default_x_gravity", "default": 0},
         "Default Y gravity": {"type": "slider", "min": -999, "max": 999, "config_key": "default_y_gravity", "default": 5},
         "Max Shapes": {"type": "slider", "min": 0, "max": 999, "config_key": "max_shapes", "default": 120},
+        "Eviction Policy": {"type": "option", "options": ["Oldest", "Farthest", "Smallest", "Random"], "config_key": "eviction_policy", "default": "Oldest"},
+        "Collision Cell Size": {"type": "slider", "min": 8, "max": 512, "config_key": "collision_cell_size", "default": 64},
+        "Contact Persist Interval": {"type": "slider", "min": 1, "max": 240, "config_key": "contact_persist_interval", "default": 1},
+        "Ticks Per Second": {"type": "slider", "min": 1, "max": 240, "config_key": "ticks_per_second", "default": 60},
+        "Max Catch-up Ticks": {"type": "slider", "min": 1, "max": 20, "config_key": "max_catch_up_ticks", "default": 5},
+        "Max Events Per Tick": {"type": "slider", "min": 100, "max": 100000, "config_key": "max_events_per_tick", "default": 1000},
+        "Max Rules Per Tick": {"type": "slider", "min": 100, "max": 500000, "config_key": "max_rules_per_tick", "default": 10000},
+        "Max Rule Time (ms)": {"type": "slider", "min": 1, "max": 100, "config_key": "max_rule_time_ms", "default": 10},
     },
     "Miscellaneous": {
         "Discord RPC": {"type": "bool", "config_key": "discord_rpc", "default": True},
+        "Profiler Overlay": {"type": "bool", "config_key": "profiler_overlay", "default": False},
+        "Profiler Export": {"type": "option", "options": ["Off", "CSV", "JSONL"], "config_key": "profiler_export", "default": "Off"},
     },
     "Credits": {}
 }
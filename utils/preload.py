@@ -1,5 +1,8 @@
 import arcade.gui, arcade, os
 
+from utils.constants import SPRITES
+from utils.texture_cache import texture_cache
+
 # Get the directory where this module is located
 _module_dir = os.path.dirname(os.path.abspath(__file__))
 _assets_dir = os.path.join(os.path.dirname(_module_dir), 'assets')
@@ -7,10 +10,8 @@ _assets_dir = os.path.join(os.path.dirname(_module_dir), 'assets')
 button_texture = arcade.gui.NinePatchTexture(64 // 4, 64 // 4, 64 // 4, 64 // 4, arcade.load_texture(os.path.join(_assets_dir, 'graphics', 'button.png')))
 button_hovered_texture = arcade.gui.NinePatchTexture(64 // 4, 64 // 4, 64 // 4, 64 // 4, arcade.load_texture(os.path.join(_assets_dir, 'graphics', 'button_hovered.png')))
 
-SPRITE_TEXTURES = {
-    os.path.splitext(file_name)[0]: arcade.load_texture(os.path.join(_assets_dir, 'graphics', 'sprites', file_name))
-    for file_name in os.listdir(os.path.join(_assets_dir, 'graphics', 'sprites'))
-}
+for sprite_path in SPRITES.values():
+    texture_cache.texture(sprite_path)
 
 theme_sound = arcade.Sound(os.path.join(_assets_dir, 'sound', 'music.ogg'))
 
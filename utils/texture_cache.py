@@ -0,0 +1,78 @@
+import arcade, hashlib, io, os
+
+from collections import OrderedDict
+from PIL import Image
+
+# Decoded sprite images, keyed by path and content hash. Once a path has been read, getting its texture again
+# doesn't touch the filesystem. The least recently used images are dropped when the cache grows past max_bytes.
+
+class TextureCache():
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()
+        self.keys_by_path = {}
+
+    def read(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+
+        key = (os.path.abspath(path), hashlib.sha1(data).hexdigest())
+        self.keys_by_path[path] = key
+
+        return key, data
+
+    def entry(self, path, reload=False):
+        key = None if reload else self.keys_by_path.get(path)
+
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        key, data = self.read(path)
+        if key in self.entries: # the file was reloaded but its content didn't change
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        entry = {"key": key, "image": image, "texture": None, "pyglet_image": None, "bytes": image.width * image.height * 4}
+
+        self.entries[key] = entry
+        self.used_bytes += entry["bytes"]
+        self.evict()
+
+        return entry
+
+    def evict(self):
+        while self.used_bytes > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            self.used_bytes -= entry["bytes"]
+
+    def image(self, path):
+        return self.entry(path)["image"]
+
+    def texture(self, path, reload=False):
+        entry = self.entry(path, reload)
+
+        if entry["texture"] is None:
+            entry["texture"] = arcade.Texture(entry["image"], hash=entry["key"][1])
+
+        return entry["texture"]
+
+    def pyglet_image(self, path):
+        entry = self.entry(path)
+
+        if entry["pyglet_image"] is None:
+            import pyglet.image # needs a GL context, which the headless simulation doesn't have
+
+            image = entry["image"]
+            entry["pyglet_image"] = pyglet.image.ImageData(image.width, image.height, "RGBA", image.tobytes(), pitch=-image.width * 4)
+
+            image_bytes = image.width * image.height * 4
+            entry["bytes"] += image_bytes
+            self.used_bytes += image_bytes
+            self.evict()
+
+        return entry["pyglet_image"]
+
+texture_cache = TextureCache()